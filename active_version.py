@@ -0,0 +1,93 @@
+import os
+
+from config_store import config
+
+# Hidden so the watcher, verify and the version index don't take them for versions
+CURRENT_NAME = ".current"
+PREVIOUS_NAME = ".previous"
+
+
+def _read_pointer(path):
+    """Version a pointer names: the target of a symlink or the content of a pointer file"""
+    try:
+        if os.path.islink(path):
+            return os.path.basename(os.readlink(path)) or None
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _write_pointer(path, version):
+    """
+    Point path at version with a single rename over the old pointer, so readers see either the
+    old or the new version. A relative symlink where possible (download_dir/.current/source/main
+    is the active game), a pointer file where symlinks need extra rights (Windows).
+    """
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        os.symlink(version, tmp_path, target_is_directory=True)
+    except (OSError, NotImplementedError):
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(version)
+    os.replace(tmp_path, path)
+
+
+def current_version(download_dir=None):
+    return _read_pointer(os.path.join(download_dir or config.get("download_dir"), CURRENT_NAME))
+
+
+def previous_version(download_dir=None):
+    return _read_pointer(os.path.join(download_dir or config.get("download_dir"), PREVIOUS_NAME))
+
+
+def select(version, download_dir=None):
+    """
+    Make version the active one: saved in the config and exposed as download_dir/.current.
+    The version that was active before is kept in .previous for rollback. "" clears the selection.
+    """
+    download_dir = download_dir or config.get("download_dir")
+    config.set("version", version)
+    current = current_version(download_dir)
+    if current == version or not os.path.isdir(download_dir):
+        return
+    if current:
+        _write_pointer(os.path.join(download_dir, PREVIOUS_NAME), current)
+    if version:
+        _write_pointer(os.path.join(download_dir, CURRENT_NAME), version)
+    else:
+        try:
+            os.remove(os.path.join(download_dir, CURRENT_NAME))
+        except OSError:
+            pass
+
+
+def rollback(download_dir=None):
+    """Switch back to the previously active version if it is still installed, returns it or None"""
+    download_dir = download_dir or config.get("download_dir")
+    previous = previous_version(download_dir)
+    if not previous or not os.path.isdir(os.path.join(download_dir, previous)):
+        return None
+    select(previous, download_dir)
+    return previous
+
+
+def sync(download_dir=None):
+    """Bring .current in line with the configured version, e.g. for a new download_dir"""
+    download_dir = download_dir or config.get("download_dir")
+    version = config.get("version")
+    if version and current_version(download_dir) != version:
+        select(version, download_dir)
+
+
+def rename(old, new, download_dir=None):
+    """The version folder old was renamed to new: the configured version and the pointers follow it"""
+    download_dir = download_dir or config.get("download_dir")
+    if config.get("version") == old:
+        config.set("version", new)
+    for name in (CURRENT_NAME, PREVIOUS_NAME):
+        path = os.path.join(download_dir, name)
+        if _read_pointer(path) == old:
+            _write_pointer(path, new)
@@ -0,0 +1,395 @@
+"""
+Benchmark of the release pipeline against a local stand-in for the GitHub releases API.
+
+    python bench_releases.py [--releases 6] [--per-page 2] [--files 200] [--file-size 8192]
+                             [--asset-size 8388608] [--changed 0.1] [--workers 4] [--runs 3]
+                             [--json out.json]
+
+Starts an HTTP server on 127.0.0.1 that serves /repos/{owner}/{repo}/releases with pagination
+(Link headers) and ETags, synthetic zipballs and assets with Range support, a manifest.json
+asset per release and raw files for delta updates. The launcher is pointed at it through
+LAUNCHER_GITHUB_API and LAUNCHER_GITHUB_RAW with a throwaway LAUNCHER_HOME, then the release list
+fetch (cold and revalidated), download, a download interrupted halfway and resumed with a Range
+request, extraction, a full and a delta install and the version index are timed. Results are printed as JSON so launcher revisions can be compared.
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+VERSION_YML = (
+    "version-data:\n"
+    "  standart-mode: host\n"
+    "  start-args:\n"
+    "    1:\n"
+    "      type: optionmenu\n"
+    "      args:\n"
+    "        host: {1: {arg: link-arg, name: Start with Port, standard: 8080, type: entry}}\n"
+    "        join: {1: {arg: link-arg, name: Join URL, standard: '', type: entry}}\n"
+).encode()
+
+
+class FakeGitHub:
+    """
+    Synthetic releases v1.1 ... v1.N (newest first, like GitHub). Every release has a source
+    tree of files files of file_size bytes plus version.yml and a "main" asset; from one release
+    to the next a changed fraction of the source files gets new content.
+    """
+
+    def __init__(self, releases, files, file_size, asset_size, changed, per_page, owner=None, repo=None):
+        self.owner = owner
+        self.repo = repo
+        self.count = releases
+        self.files = files
+        self.file_size = file_size
+        self.asset_size = asset_size
+        self.period = max(1, round(1 / changed)) if changed > 0 else 0
+        self.per_page = per_page
+        # Release numbers k published as pre-release
+        self.prereleases = set()
+        self.base_url = None
+        self.stats = {"requests": 0, "not_modified": 0, "ranges": 0, "bytes_sent": 0}
+        self._lock = threading.Lock()
+        self._blobs = {}
+        self._etags = {}
+
+    def tag(self, k):
+        return f"v1.{k}"
+
+    def _file_content(self, i, k):
+        # The content of file i changes in release k when (i + k) is a multiple of period
+        generation = sum(1 for j in range(1, k + 1) if self.period and (i + j) % self.period == 0)
+        return random.Random(f"{i}-{generation}").randbytes(self.file_size)
+
+    def source_files(self, k):
+        def build():
+            files = {f"src/file_{i:05d}.go": self._file_content(i, k) for i in range(self.files)}
+            files["version.yml"] = VERSION_YML
+            return files
+        return self._blob(("source", k), build)
+
+    def _blob(self, key, build):
+        with self._lock:
+            blob = self._blobs.get(key)
+        if blob is None:
+            blob = build()
+            with self._lock:
+                self._blobs[key] = blob
+        return blob
+
+    def zipball(self, k):
+        def build():
+            buf = io.BytesIO()
+            prefix = f"{self.owner}-{self.repo}-{hashlib.sha1(self.tag(k).encode()).hexdigest()[:7]}/"
+            with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+                for rel, data in self.source_files(k).items():
+                    info = zipfile.ZipInfo(prefix + rel)
+                    info.external_attr = 0o100644 << 16
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                    zf.writestr(info, data)
+            return buf.getvalue()
+        return self._blob(("zip", k), build)
+
+    def etag(self, data):
+        with self._lock:
+            etag = self._etags.get(id(data))
+        if etag is None:
+            etag = '"' + hashlib.sha1(data).hexdigest() + '"'
+            with self._lock:
+                self._etags[id(data)] = etag
+        return etag
+
+    def asset(self, k, name):
+        if name == "main":
+            return self._blob(("main", k), lambda: random.Random(f"main-{k}").randbytes(self.asset_size))
+        if name == "manifest.json":
+            return self._blob(("manifest", k), lambda: self._manifest(k))
+        return None
+
+    def _manifest(self, k):
+        files = {
+            rel: {"sha256": hashlib.sha256(data).hexdigest(), "size": len(data), "mode": 0o644}
+            for rel, data in self.source_files(k).items()
+        }
+        main = self.asset(k, "main")
+        files["main"] = {"sha256": hashlib.sha256(main).hexdigest(), "size": len(main), "mode": 0o755}
+        return json.dumps({"files": files}).encode()
+
+    def release(self, k):
+        tag = self.tag(k)
+        return {
+            "name": f"Release {tag}",
+            "tag_name": tag,
+            "zipball_url": f"{self.base_url}/zipball/{tag}",
+            "published_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(1700000000 + k * 86400)),
+            "draft": False,
+            "prerelease": k in self.prereleases,
+            "assets": [
+                {"name": name, "browser_download_url": f"{self.base_url}/download/{tag}/{name}", "size": None}
+                for name in ("main", "manifest.json")
+            ],
+        }
+
+    def releases_page(self, page, per_page):
+        per_page = min(per_page, self.per_page)
+        numbers = list(range(self.count, 0, -1))
+        chunk = numbers[(page - 1) * per_page:page * per_page]
+        has_next = page * per_page < len(numbers)
+        return [self.release(k) for k in chunk], has_next, per_page
+
+    def release_number(self, tag):
+        for k in range(1, self.count + 1):
+            if self.tag(k) == tag:
+                return k
+        return None
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "FakeGitHub/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def github(self):
+        return self.server.github
+
+    def do_GET(self):
+        with self.github._lock:
+            self.github.stats["requests"] += 1
+        url = urlsplit(self.path)
+        parts = [unquote(p) for p in url.path.strip("/").split("/")]
+        gh = self.github
+        if parts == ["repos", gh.owner, gh.repo, "releases"]:
+            return self._releases(parse_qs(url.query))
+        if len(parts) == 2 and parts[0] == "zipball":
+            k = gh.release_number(parts[1])
+            if k:
+                return self._send_blob(gh.zipball(k), "application/zip")
+        if len(parts) == 3 and parts[0] == "download":
+            k = gh.release_number(parts[1])
+            data = gh.asset(k, parts[2]) if k else None
+            if data is not None:
+                return self._send_blob(data, "application/octet-stream")
+        if len(parts) >= 5 and parts[:3] == ["raw", gh.owner, gh.repo]:
+            k = gh.release_number(parts[3])
+            data = gh.source_files(k).get("/".join(parts[4:])) if k else None
+            if data is not None:
+                return self._send_blob(data, "text/plain")
+        self._send(404, b"Not Found", "text/plain")
+
+    def _releases(self, query):
+        page = int(query.get("page", ["1"])[0])
+        per_page = int(query.get("per_page", ["30"])[0])
+        releases, has_next, per_page = self.github.releases_page(page, per_page)
+        body = json.dumps(releases).encode()
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            with self.github._lock:
+                self.github.stats["not_modified"] += 1
+            return self._send(304, b"", None, {"ETag": etag})
+        headers = {"ETag": etag}
+        if has_next:
+            base = f"{self.github.base_url}/repos/{quote(self.github.owner)}/{quote(self.github.repo)}/releases"
+            headers["Link"] = f'<{base}?per_page={per_page}&page={page + 1}>; rel="next"'
+        self._send(200, body, "application/json", headers)
+
+    def _send_blob(self, data, content_type):
+        etag = self.github.etag(data)
+        headers = {"Accept-Ranges": "bytes", "ETag": etag}
+        range_header = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        if range_header and range_header.startswith("bytes=") and (not if_range or if_range == etag):
+            start_text, _, end_text = range_header[len("bytes="):].partition("-")
+            start = int(start_text)
+            end = int(end_text) if end_text else len(data) - 1
+            if start >= len(data):
+                headers["Content-Range"] = f"bytes */{len(data)}"
+                return self._send(416, b"", None, headers)
+            with self.github._lock:
+                self.github.stats["ranges"] += 1
+            headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+            return self._send(206, data[start:end + 1], content_type, headers)
+        self._send(200, data, content_type, headers)
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+            with self.github._lock:
+                self.github.stats["bytes_sent"] += len(body)
+
+
+def start_server(github):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.github = github
+    github.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, name="fake-github", daemon=True).start()
+    return server
+
+
+def timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return (time.perf_counter() - started) * 1000, result
+
+
+def mb_per_s(num_bytes, ms):
+    return round(num_bytes / (1024 * 1024) / (ms / 1000), 2) if ms > 0 else None
+
+
+def run_pipeline(github, work_dir, workers):
+    """One cold run of the whole pipeline, returns {stage: {"ms", ...}}"""
+    import releases
+    import version_index
+    from downloader import DownloadError, DownloadJob, download_many, set_bandwidth_limit
+    from installer import extract_zipball, install
+
+    results = {}
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(releases.cache_path())
+
+    ms, (release_list, changed) = timed(releases.revalidate_releases)
+    results["fetch_releases"] = {"ms": ms, "releases": len(release_list)}
+    ms, (_, changed) = timed(releases.revalidate_releases)
+    results["revalidate_releases"] = {"ms": ms, "not_modified": not changed}
+
+    newest, previous = release_list[0], release_list[1]
+    scratch = os.path.join(work_dir, "scratch")
+    os.makedirs(scratch)
+    jobs = [DownloadJob("source.zip", previous["zipball_url"], os.path.join(scratch, "source.zip"))] + [
+        DownloadJob(a["name"], a["browser_download_url"], os.path.join(scratch, a["name"]))
+        for a in previous["assets"]
+    ]
+    ms, _ = timed(download_many, jobs, max_workers=workers)
+    downloaded = sum(job.done for job in jobs)
+    results["download"] = {"ms": ms, "bytes": downloaded, "mb_per_s": mb_per_s(downloaded, ms)}
+
+    # Cancel the main asset halfway, then time picking it up again from the .part file
+    asset = next(a for a in newest["assets"] if a["name"] != "manifest.json")
+    resume_dest = os.path.join(scratch, f"resume-{asset['name']}")
+    cancel = threading.Event()
+
+    def cancel_halfway(job):
+        if job.size and job.done >= job.size // 2:
+            cancel.set()
+
+    first = DownloadJob(asset["name"], asset["browser_download_url"], resume_dest, size=asset.get("size"))
+    # The first asset_size bytes never wait for this limit, it only keeps the chunks at a tenth of the file
+    # so the cancel lands near the middle
+    set_bandwidth_limit(github.asset_size)
+    try:
+        with contextlib.suppress(DownloadError):
+            download_many([first], max_workers=1, progress=cancel_halfway, cancel_event=cancel)
+    finally:
+        set_bandwidth_limit(0)
+    resumed_from = os.path.getsize(f"{resume_dest}.part") if os.path.exists(f"{resume_dest}.part") else 0
+    ranges = github.stats["ranges"]
+    job = DownloadJob(asset["name"], asset["browser_download_url"], resume_dest, size=asset.get("size"))
+    ms, _ = timed(download_many, [job], max_workers=1)
+    fetched = job.done - resumed_from
+    results["resume"] = {"ms": ms, "resumed_from": resumed_from, "bytes": fetched,
+                         "mb_per_s": mb_per_s(fetched, ms), "range_requests": github.stats["ranges"] - ranges}
+
+    ms, files = timed(extract_zipball, jobs[0].dest, os.path.join(scratch, "source"))
+    extracted = sum(entry["size"] for entry in files.values())
+    results["extract"] = {"ms": ms, "files": len(files), "bytes": extracted, "mb_per_s": mb_per_s(extracted, ms)}
+
+    download_dir = os.path.join(work_dir, "versions")
+    os.makedirs(download_dir)
+    ms, _ = timed(install, download_dir, previous, max_workers=workers, delta=False)
+    results["install_full"] = {"ms": ms, "bytes": downloaded, "mb_per_s": mb_per_s(downloaded, ms)}
+    ms, _ = timed(install, download_dir, newest, max_workers=workers, delta=True)
+    results["install_delta"] = {"ms": ms}
+
+    cold_index = version_index.VersionIndex(path=os.path.join(work_dir, "index.json"))
+    ms, entries = timed(cold_index.entries, download_dir)
+    results["index_cold"] = {"ms": ms, "versions": len(entries)}
+    ms, _ = timed(cold_index.entries, download_dir)
+    results["index_warm"] = {"ms": ms}
+    return results
+
+
+def summarize(runs):
+    summary = {}
+    for stage in runs[0]:
+        values = [run[stage]["ms"] for run in runs]
+        summary[stage] = dict(runs[-1][stage], ms=round(statistics.median(values), 2),
+                              runs_ms=[round(v, 2) for v in values])
+        if "mb_per_s" in summary[stage]:
+            summary[stage]["mb_per_s"] = mb_per_s(summary[stage]["bytes"], summary[stage]["ms"])
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--releases", type=int, default=6)
+    parser.add_argument("--per-page", type=int, default=2, help="page size the server allows, forces pagination")
+    parser.add_argument("--files", type=int, default=200, help="source files per release")
+    parser.add_argument("--file-size", type=int, default=8192)
+    parser.add_argument("--asset-size", type=int, default=8 * 1024 * 1024)
+    parser.add_argument("--changed", type=float, default=0.1, help="fraction of source files changed per release")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+    if args.releases < 2:
+        parser.error("--releases must be at least 2 for the delta install")
+
+    work_root = tempfile.mkdtemp(prefix="launcher-bench-")
+    try:
+        github = FakeGitHub(args.releases, args.files, args.file_size, args.asset_size, args.changed, args.per_page)
+        server = start_server(github)
+        # Must be set before the launcher modules are imported, they read them at import time
+        os.environ["LAUNCHER_HOME"] = os.path.join(work_root, "launcher")
+        os.environ["LAUNCHER_GITHUB_API"] = github.base_url
+        os.environ["LAUNCHER_GITHUB_RAW"] = f"{github.base_url}/raw"
+        from config_store import OWNER, REPO
+        github.owner, github.repo = OWNER, REPO
+
+        runs = []
+        with contextlib.redirect_stdout(sys.stderr):
+            for i in range(args.runs):
+                work_dir = os.path.join(work_root, f"run{i}")
+                os.makedirs(work_dir)
+                runs.append(run_pipeline(github, work_dir, args.workers))
+        server.shutdown()
+    finally:
+        shutil.rmtree(work_root, ignore_errors=True)
+
+    result = {
+        "python": sys.version.split()[0],
+        "params": {k: v for k, v in vars(args).items() if k != "json"},
+        "stages": summarize(runs),
+        "server": github.stats,
+    }
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.json:
+        with open(args.json, "w") as f:
+            f.write(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
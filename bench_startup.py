@@ -0,0 +1,131 @@
+"""
+Cold-start benchmark of the GUI launcher.
+
+    python bench_startup.py [--runs 5] [--budget-ms 1000] [--import-budget-ms 250] [--json out.json]
+
+Measures the import time of main.py with python -X importtime (total and the slowest modules)
+and the time-to-first-window by starting main.py with LAUNCHER_STARTUP_PROBE set, which makes
+it print the time from spawn until the window is up and quit. Both run with LAUNCHER_HOME
+pointed at a throwaway launcher folder seeded with a few installed versions, so the user's own
+config, downloads and versions are never touched and every run starts from the same state.
+Results are printed as JSON.
+Exits with 1 if a median is over budget or a module that should be lazy got imported eagerly.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STARTUP_BUDGET_MS = 1000
+IMPORT_BUDGET_MS = 250
+# Must only be loaded once the Version Manager or a download is used
+LAZY_MODULES = ("requests", "urllib3", "zipfile", "installer", "downloader", "releases", "transport")
+VERSION_YML = "version-data:\n  standart-mode: host\n  start-args: {}\n"
+
+
+def seed_launcher_home(home, versions):
+    """A launcher folder with that many installed versions, the newest one becomes the selected one"""
+    for i in range(versions):
+        version_dir = os.path.join(home, "versions", f"v1.{i}")
+        os.makedirs(os.path.join(version_dir, "source"))
+        with open(os.path.join(version_dir, "metadata.yml"), "w", encoding="utf-8") as f:
+            f.write(f"metadata:\n  version: v1.{i}\n  installed_at: {time.time() - (versions - i) * 3600}\n")
+        with open(os.path.join(version_dir, "source", "version.yml"), "w", encoding="utf-8") as f:
+            f.write(VERSION_YML)
+
+
+def measure_imports(env=None):
+    """(total import ms of main, {module: self ms}) from one python -X importtime run"""
+    res = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=HERE, env=env, capture_output=True, text=True, timeout=60,
+    )
+    modules = {}
+    total_us = None
+    for line in res.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, raw_name = line[len("import time:"):].split("|")
+        name = raw_name.strip()
+        if not raw_name[1:].startswith(" ") and name != "main":
+            # A top-level import of the interpreter itself (site, ...), not part of main
+            modules = {}
+            continue
+        modules[name] = int(self_us) / 1000
+        if name == "main":
+            total_us = int(cumulative_us)
+    if total_us is None:
+        raise RuntimeError(f"Importing main failed:\n{res.stderr[-2000:]}")
+    return total_us / 1000, modules
+
+
+def measure_first_window(env=None, timeout=30):
+    """Time from spawning main.py to its first window in ms, None if no window can be opened"""
+    env = dict(env or os.environ, LAUNCHER_STARTUP_PROBE=repr(time.time()))
+    res = subprocess.run(
+        [sys.executable, "main.py"], cwd=HERE, env=env, capture_output=True, text=True, timeout=timeout,
+    )
+    for line in res.stdout.splitlines():
+        if line.startswith("time_to_first_window_ms="):
+            return float(line.split("=", 1)[1])
+    print(f"main.py didn't open a window (no display?): {res.stderr.strip()[-300:]}", file=sys.stderr)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=10, help="number of slowest modules to list")
+    parser.add_argument("--versions", type=int, default=5, help="installed versions in the throwaway launcher folder")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    home = tempfile.mkdtemp(prefix="launcher-bench-startup-")
+    try:
+        seed_launcher_home(home, args.versions)
+        env = dict(os.environ, LAUNCHER_HOME=home)
+        import_runs = []
+        modules = {}
+        for _ in range(args.runs):
+            total, modules = measure_imports(env)
+            import_runs.append(total)
+
+        window_runs = [t for t in (measure_first_window(env) for _ in range(args.runs)) if t is not None]
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+    eager = sorted(m for m in modules if m.split(".")[0] in LAZY_MODULES)
+    result = {
+        "python": sys.version.split()[0],
+        "import_ms": {"median": statistics.median(import_runs), "runs": import_runs},
+        "slowest_modules_ms": dict(sorted(modules.items(), key=lambda kv: kv[1], reverse=True)[:args.top]),
+        "eagerly_imported_lazy_modules": eager,
+        "time_to_first_window_ms": {
+            "median": statistics.median(window_runs) if window_runs else None,
+            "runs": window_runs,
+        },
+        "budget_ms": {"import": args.import_budget_ms, "first_window": args.budget_ms},
+    }
+    over_budget = result["import_ms"]["median"] > args.import_budget_ms or (
+        window_runs and result["time_to_first_window_ms"]["median"] > args.budget_ms
+    )
+    result["ok"] = not over_budget and not eager
+
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.json:
+        with open(args.json, "w") as f:
+            f.write(text)
+    return 0 if result["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
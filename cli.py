@@ -0,0 +1,304 @@
+"""
+Headless command line front-end of the launcher, works without a display.
+
+    python cli.py list [--installed]
+    python cli.py install <release> [--workers N] [--full]
+    python cli.py queue [release ...] [--priority P] [--run]
+    python cli.py prefetch
+    python cli.py select <version> | --previous
+    python cli.py launch [host|join] [port or url]
+    python cli.py swarm <clients> [--rate R] [--duration S] [--json report.json]
+    python cli.py verify
+    python cli.py evict [--dry-run]
+    python cli.py status
+
+Only config_store is imported up front, everything else is loaded by the command that needs it.
+"""
+import argparse
+import os
+import sys
+import time
+
+from config_store import config
+
+
+def installed_versions(download_dir):
+    from version_index import index
+
+    return sorted(index.entries(download_dir))
+
+
+def load_releases(offline=False):
+    from releases import cached_releases, revalidate_releases, RateLimited
+
+    if offline:
+        return cached_releases()
+    try:
+        return revalidate_releases()[0]
+    except RateLimited as e:
+        print(f"{e}, using cached release list", file=sys.stderr)
+        return cached_releases()
+
+
+def cmd_list(args):
+    if args.installed:
+        current = config.get("version")
+        for name in installed_versions(config.get("download_dir")):
+            print(("* " if name == current else "  ") + name)
+        return 0
+    for release in load_releases(args.offline):
+        print(f"{release['name']}\t{release['tag_name']}\t{len(release['assets'])} assets")
+    return 0
+
+
+def cmd_install(args):
+    from installer import install
+    from downloader import DEFAULT_MAX_WORKERS
+    from progress import ProgressTracker, PrintSink
+
+    release = next((r for r in load_releases(args.offline) if args.release in (r["name"], r["tag_name"])), None)
+    if release is None:
+        print(f"Release '{args.release}' not found", file=sys.stderr)
+        return 1
+
+    version_dir = install(
+        config.get("download_dir"), release,
+        max_workers=args.workers or config.get("download_workers", DEFAULT_MAX_WORKERS),
+        progress=ProgressTracker(release["name"], listeners=[PrintSink()]),
+        dedupe=config.get("dedupe", False),
+        delta=config.get("delta_updates", True) and not args.full,
+    )
+    print(f"Installed {release['name']} to {version_dir}")
+    if args.select:
+        import active_version
+
+        active_version.select(release["name"])
+    import retention
+
+    retention.evict(keep=[release["name"]])
+    return 0
+
+
+def cmd_queue(args):
+    import download_queue
+    from progress import PrintSink
+
+    queue = download_queue.queue
+    if args.releases:
+        releases = load_releases(args.offline)
+        for name in args.releases:
+            release = next((r for r in releases if name in (r["name"], r["tag_name"])), None)
+            if release is None:
+                print(f"Release '{name}' not found", file=sys.stderr)
+                return 1
+            queue.add(release, args.priority)
+
+    if args.run:
+        sink = PrintSink()
+        queue.subscribe(lambda item, event: sink(event) if event is not None else None)
+        queue.start()
+        while queue.pending():
+            time.sleep(0.5)
+
+    items = queue.items()
+    if not items:
+        print("Download queue is empty")
+    for item in items:
+        print(download_queue.format_item(item))
+    return 1 if any(item.state == download_queue.FAILED for item in items) else 0
+
+
+def cmd_prefetch(args):
+    import download_queue
+    import prefetch
+
+    queue = download_queue.queue
+    release = prefetch.check(queue)
+    if release is None:
+        print("No new release to prefetch")
+        return 0
+    print(f"Prefetching {release['name']}")
+    queue.start()
+    while queue.pending():
+        time.sleep(0.5)
+    item = queue.find(release["name"])
+    print(download_queue.format_item(item))
+    return 0 if item.state == download_queue.DONE else 1
+
+
+def cmd_select(args):
+    import active_version
+
+    if args.previous:
+        version = active_version.rollback()
+        if version is None:
+            print("No previous version to go back to", file=sys.stderr)
+            return 1
+        print(f"Selected {version}")
+        return 0
+    if not args.version:
+        print("Name a version or use --previous", file=sys.stderr)
+        return 1
+    if args.version not in installed_versions(config.get("download_dir")):
+        print(f"Version '{args.version}' is not installed", file=sys.stderr)
+        return 1
+    active_version.select(args.version)
+    print(f"Selected {args.version}")
+    return 0
+
+
+def cmd_launch(args):
+    import game
+
+    download_dir = config.get("download_dir")
+    version = args.version or config.get("version")
+    if not version:
+        print("No version selected, use 'select' first", file=sys.stderr)
+        return 1
+    version_data = game.load_version_data(download_dir, version)
+    mode = args.mode or version_data["standart-mode"]
+    arg = args.arg if args.arg is not None else game.default_arg(version_data, mode)
+    game_exe = game.game_executable(download_dir, version)
+    if not os.path.exists(game_exe):
+        print(f"Game executable not found at: {game_exe}", file=sys.stderr)
+        return 1
+    from supervisor import supervisor
+    import retention
+
+    proc = supervisor.start(version, game_exe, mode, arg, game.game_dir(download_dir, version), echo=True)
+    retention.record_launch(version)
+    try:
+        return proc.popen.wait()
+    finally:
+        # Ctrl+C or an error in the launcher: don't leave the game running
+        supervisor.shutdown()
+
+
+def cmd_swarm(args):
+    import swarm
+
+    version = args.version or config.get("version")
+    if not version:
+        print("No version selected, use 'select' first", file=sys.stderr)
+        return 1
+    report = swarm.run_swarm(
+        config.get("download_dir"), version, args.clients,
+        rate=args.rate, duration=args.duration, join_url=args.join_url,
+        log=lambda msg: print(msg, file=sys.stderr),
+    )
+    print(swarm.format_report(report))
+    if args.json:
+        swarm.save_report(report, args.json)
+    return 1 if report["summary"]["exited_early"] else 0
+
+
+def cmd_verify(args):
+    import verify
+
+    reports = verify.verify_versions(config.get("download_dir"), names=args.versions or None, quick=args.quick)
+    print(verify.format_report(reports))
+    return 1 if verify.broken_versions(reports) else 0
+
+
+def cmd_evict(args):
+    import retention
+
+    max_bytes, max_versions = retention.limits()
+    if not max_bytes and not max_versions:
+        print("No retention limit set (retention_max_bytes, retention_max_versions)")
+        return 0
+    if not retention.evict(dry_run=args.dry_run):
+        print("All versions fit into the retention limits")
+    return 0
+
+
+def cmd_status(args):
+    import supervisor
+
+    data = supervisor.read_status_file()
+    if not data or not data["processes"]:
+        print("No game instances recorded")
+        return 0
+    age = time.time() - data["updated_at"]
+    print(f"Launcher {data['launcher_pid']}, updated {age:.0f}s ago")
+    for status in data["processes"]:
+        print(supervisor.format_status_line(status))
+        if status.get("log_path"):
+            print(f"    log: {status['log_path']}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="First-go-game launcher without GUI")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("list", help="list releases (or installed versions)")
+    p.add_argument("--installed", action="store_true", help="list installed versions, * marks the selected one")
+    p.add_argument("--offline", action="store_true", help="only use the cached release list")
+    p.set_defaults(func=cmd_list)
+
+    p = sub.add_parser("install", help="download and install a release")
+    p.add_argument("release", help="release name or tag")
+    p.add_argument("--workers", type=int, help="concurrent downloads")
+    p.add_argument("--full", action="store_true", help="always download the whole release, no delta update")
+    p.add_argument("--select", action="store_true", help="select the version after installing")
+    p.add_argument("--offline", action="store_true", help="look the release up in the cache only")
+    p.set_defaults(func=cmd_install)
+
+    p = sub.add_parser("queue", help="show the download queue, add releases to it or work through it")
+    p.add_argument("releases", nargs="*", metavar="release", help="release names or tags to queue")
+    p.add_argument("--priority", type=int, default=0, help="higher priorities are downloaded first")
+    p.add_argument("--run", action="store_true", help="download everything queued and wait until it is done")
+    p.add_argument("--offline", action="store_true", help="look the releases up in the cache only")
+    p.set_defaults(func=cmd_queue)
+
+    p = sub.add_parser("prefetch", help="install the newest release in the background if it is new (for cron jobs)")
+    p.set_defaults(func=cmd_prefetch)
+
+    p = sub.add_parser("select", help="select the version to launch")
+    p.add_argument("version", nargs="?")
+    p.add_argument("--previous", action="store_true", help="go back to the version that was selected before")
+    p.set_defaults(func=cmd_select)
+
+    p = sub.add_parser("launch", help="start the selected version")
+    p.add_argument("mode", nargs="?", choices=("host", "join"), help="default: standart-mode of version.yml")
+    p.add_argument("arg", nargs="?", help="port to host on or URL to join, default from version.yml")
+    p.add_argument("--version", help="launch this version instead of the selected one")
+    p.set_defaults(func=cmd_launch)
+
+    p = sub.add_parser("swarm", help="load test: start one host and N join clients against it")
+    p.add_argument("clients", type=int)
+    p.add_argument("--rate", type=float, default=2.0, help="clients started per second")
+    p.add_argument("--duration", type=float, default=30.0, help="seconds to keep running after the last client started")
+    p.add_argument("--join-url", help="join argument, {host} and {port} are filled in (default from version.yml)")
+    p.add_argument("--version", help="use this version instead of the selected one")
+    p.add_argument("--json", help="write the full report to this file")
+    p.set_defaults(func=cmd_swarm)
+
+    p = sub.add_parser("verify", help="check installed versions against their manifests")
+    p.add_argument("versions", nargs="*")
+    p.add_argument("--quick", action="store_true", help="only compare file sizes")
+    p.set_defaults(func=cmd_verify)
+
+    p = sub.add_parser("evict", help="delete least recently used versions over the retention limits")
+    p.add_argument("--dry-run", action="store_true", help="only show what would be deleted")
+    p.set_defaults(func=cmd_evict)
+
+    p = sub.add_parser("status", help="show the game instances of the running launcher, with CPU and memory use")
+    p.set_defaults(func=cmd_status)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        return 130
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+import copy
+import json
+import os
+import platform
+import tempfile
+import threading
+
+import yaml_io
+
+# --- CONFIG ---
+OWNER = "jonasb2510"       # Hardcoded repo owner
+REPO = "first-go-game"   # Hardcoded repo name
+# LAUNCHER_GITHUB_API/LAUNCHER_GITHUB_RAW point the launcher at another server, e.g. the one of bench_releases.py
+GITHUB_API = os.environ.get("LAUNCHER_GITHUB_API", "https://api.github.com")
+GITHUB_RAW = os.environ.get("LAUNCHER_GITHUB_RAW", "https://raw.githubusercontent.com")
+API_URL = f"{GITHUB_API}/repos/{OWNER}/{REPO}/releases"
+APP_NAME = "first-go-game-launcher"
+# Overrides the launcher directory on every platform, e.g. for the throwaway state of bench_releases.py
+LAUNCHER_HOME_ENV = "LAUNCHER_HOME"
+
+
+def get_appdata_dir():
+    system = platform.system()
+
+    if system == "Windows":
+        base_dir = os.getenv("APPDATA", os.path.expanduser("~\\AppData\\Roaming"))
+    elif system == "Darwin":
+        base_dir = os.path.expanduser("~/Library/Application Support")
+    else:
+        base_dir = os.getenv("XDG_CONFIG_HOME", os.path.expanduser("~/.config"))
+
+    return base_dir
+
+
+def get_launcher_dir():
+    """Directory where the launcher keeps config.yml and its other state"""
+    return os.environ.get(LAUNCHER_HOME_ENV) or os.path.join(get_appdata_dir(), APP_NAME)
+
+
+def default_versions_dir():
+    return os.path.join(get_launcher_dir(), "versions")
+
+
+def _atomic_write(path, suffix, dump, fsync):
+    """Write through dump(file) to a temp file next to path and swap it in with os.replace"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=suffix, dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            dump(f)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_yaml(path, data):
+    """Dump data to a temp file next to path and swap it in with os.replace"""
+    _atomic_write(path, ".yml", lambda f: yaml_io.dump(data, f), fsync=True)
+
+
+def atomic_write_json(path, data, indent=None):
+    """Like atomic_write_yaml for the launcher's JSON state files, without fsync as they are rewritten often"""
+    _atomic_write(path, ".json", lambda f: json.dump(data, f, indent=indent), fsync=False)
+
+
+class ConfigStore:
+    """
+    Shared, thread-safe view of config.yml.
+    The file is parsed once and only parsed again when its mtime or size changes,
+    writes go through to disk atomically.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(get_launcher_dir(), "config.yml")
+        self._lock = threading.RLock()
+        self._data = None
+        self._stamp = None
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _create_default(self):
+        versions_path = default_versions_dir()
+        os.makedirs(versions_path, exist_ok=True)
+        try:
+            version = [n for n in sorted(os.listdir(versions_path)) if not n.startswith(".")][-1]
+        except Exception:
+            print("No version found normal on first launch!")
+            version = ""
+        return {
+            "settings": {"download_dir": versions_path, "version": version}
+        }
+
+    def _load(self):
+        """Return the cached dict, re-reading config.yml if it changed on disk. Caller holds the lock."""
+        stamp = self._file_stamp()
+        if stamp is None:
+            data = self._create_default()
+            self._write(data)
+            return self._data
+        if self._data is None or stamp != self._stamp:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = yaml_io.load(f) or {}
+            if not isinstance(data, dict):
+                data = {}
+            # "settings:" with nothing below it loads as None
+            if not isinstance(data.get("settings"), dict):
+                data["settings"] = {}
+            self._data = data
+            self._stamp = stamp
+        return self._data
+
+    def _write(self, data):
+        atomic_write_yaml(self.path, data)
+        self._data = data
+        self._stamp = self._file_stamp()
+
+    def data(self):
+        """Copy of the whole config, safe for the caller to modify"""
+        with self._lock:
+            return copy.deepcopy(self._load())
+
+    def get(self, key, default=None):
+        """Value from the settings section"""
+        with self._lock:
+            return self._load()["settings"].get(key, default)
+
+    def set(self, key, value):
+        self.update({key: value})
+
+    def update(self, settings):
+        """Merge settings into the settings section and write the file, skipped if nothing changed"""
+        with self._lock:
+            data = copy.deepcopy(self._load())
+            if all(data["settings"].get(k) == v for k, v in settings.items()):
+                return
+            data["settings"].update(settings)
+            self._write(data)
+
+
+config = ConfigStore()
+
+
+def get_config_data():
+    return config.data()
@@ -0,0 +1,328 @@
+import json
+import os
+import sys
+import threading
+import time
+
+from config_store import atomic_write_json, config, get_launcher_dir
+
+QUEUE_FILE_NAME = "download_queue.json"
+DEFAULT_CONCURRENCY = 1
+
+QUEUED = "queued"
+RUNNING = "running"
+PAUSED = "paused"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+
+def lower_thread_priority():
+    """
+    Run the calling thread, and the threads it starts from now on, at the lowest CPU priority.
+    On Linux the disk I/O priority follows the nice value, Windows' background mode lowers both.
+    """
+    try:
+        if sys.platform.startswith("linux"):
+            # On Linux the nice value belongs to the thread, PRIO_PROCESS with a thread id only touches this one
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        elif sys.platform == "win32":
+            import ctypes
+
+            THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_MODE_BACKGROUND_BEGIN)
+    except (OSError, AttributeError):
+        pass
+
+
+class QueueItem:
+    """One release waiting in, or done with, the download queue"""
+
+    def __init__(self, release, priority=0, state=QUEUED, error=None, added_at=None, background=False):
+        self.release = release
+        self.priority = priority
+        # Background items (prefetches) run at low priority and give way to everything the user queued
+        self.background = background
+        self.state = state
+        self.error = error
+        self.added_at = added_at or time.time()
+        self.progress = None  # latest release-wide ProgressEvent while running
+        self._cancel_event = None
+        self._stop_as = None
+
+    @property
+    def name(self):
+        return self.release["name"]
+
+    def to_dict(self):
+        return {
+            "release": self.release,
+            "priority": self.priority,
+            "state": self.state,
+            "error": self.error,
+            "added_at": self.added_at,
+            "background": self.background,
+        }
+
+
+class DownloadQueue:
+    """
+    Persistent queue of releases to install, stored in download_queue.json in the appdata folder.
+    Higher priority goes first, equal priorities in the order they were added. At most the
+    download_concurrency setting of releases install at the same time and all downloads together
+    stay under the bandwidth_limit_kb setting (KB/s, 0 for no limit). A running item can be paused
+    (its .partial files are kept and the download resumes later with Range requests) or cancelled.
+    Items that were running when the launcher exited are picked up again by start().
+    Background items only start when no item the user queued is waiting, and a running one is
+    put back into the queue (keeping its .partial files) as soon as a user item needs its slot.
+    Listeners get (item, progress_event or None) on the worker threads after every change.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(get_launcher_dir(), QUEUE_FILE_NAME)
+        self._lock = threading.RLock()
+        self._items = []
+        self._listeners = []
+        self._started = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        for entry in data.get("items", []):
+            item = QueueItem(entry["release"], entry.get("priority", 0), entry.get("state", QUEUED),
+                             entry.get("error"), entry.get("added_at"), entry.get("background", False))
+            if item.state == RUNNING:
+                item.state = QUEUED
+            self._items.append(item)
+
+    def _save(self):
+        """Caller holds the lock"""
+        atomic_write_json(self.path, {"items": [item.to_dict() for item in self._items]})
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, item, event=None):
+        for listener in list(self._listeners):
+            listener(item, event)
+
+    def items(self):
+        with self._lock:
+            return list(self._items)
+
+    def pending(self):
+        """True if something is queued or was interrupted, i.e. start() has work to do"""
+        with self._lock:
+            return any(item.state in (QUEUED, RUNNING) for item in self._items)
+
+    def find(self, name):
+        with self._lock:
+            return next((item for item in self._items if item.name == name), None)
+
+    def start(self):
+        """Apply the bandwidth setting and begin working through the queue"""
+        from downloader import set_bandwidth_limit
+
+        set_bandwidth_limit(config.get("bandwidth_limit_kb", 0) * 1024)
+        with self._lock:
+            self._started = True
+        self._schedule()
+
+    def set_limits(self, concurrency, bandwidth_kb):
+        """Save new download_concurrency/bandwidth_limit_kb settings and apply them right away"""
+        from downloader import set_bandwidth_limit
+
+        config.update({"download_concurrency": concurrency, "bandwidth_limit_kb": bandwidth_kb})
+        set_bandwidth_limit(bandwidth_kb * 1024)
+        self._schedule()
+
+    def add(self, release, priority=0, background=False):
+        """Queue a release, a release that is already queued just gets the new priority"""
+        with self._lock:
+            item = self.find(release["name"])
+            if item is not None and item.state not in FINISHED_STATES:
+                item.priority = priority
+                # The user asking for a prefetching release makes it a normal download
+                item.background = item.background and background
+            else:
+                if item is not None:
+                    self._items.remove(item)
+                item = QueueItem(release, priority, background=background)
+                self._items.append(item)
+            self._save()
+        self._notify(item)
+        self._schedule()
+        return item
+
+    def set_priority(self, name, priority):
+        with self._lock:
+            item = self.find(name)
+            if item is None:
+                return
+            item.priority = priority
+            self._save()
+        self._notify(item)
+        self._schedule()
+
+    def pause(self, name):
+        self._stop(name, PAUSED)
+
+    def cancel(self, name):
+        self._stop(name, CANCELLED)
+
+    def _stop(self, name, state):
+        with self._lock:
+            item = self.find(name)
+            if item is None or item.state in FINISHED_STATES:
+                return
+            if item.state == RUNNING:
+                # The worker notices the event between two chunks and finishes the state change
+                item._stop_as = state
+                item._cancel_event.set()
+                return
+            item.state = state
+            self._save()
+        if state == CANCELLED:
+            self._discard(item)
+        self._notify(item)
+
+    def resume(self, name):
+        with self._lock:
+            item = self.find(name)
+            if item is None or item.state not in (PAUSED, FAILED, CANCELLED):
+                return
+            item.state = QUEUED
+            item.error = None
+            self._save()
+        self._notify(item)
+        self._schedule()
+
+    def clear_finished(self):
+        with self._lock:
+            self._items = [item for item in self._items if item.state not in FINISHED_STATES]
+            self._save()
+
+    def _next_items(self):
+        """Items to start now, caller holds the lock"""
+        limit = max(1, int(config.get("download_concurrency", DEFAULT_CONCURRENCY)))
+        running = sum(item.state == RUNNING for item in self._items)
+        queued = [item for item in self._items if item.state == QUEUED]
+        queued.sort(key=lambda item: (item.background, -item.priority, item.added_at))
+        return queued[:max(0, limit - running)]
+
+    def _preempt(self, starting):
+        """Send running background items back to the queue while user items wait, caller holds the lock"""
+        waiting = sum(item.state == QUEUED and not item.background for item in self._items)
+        waiting -= sum(not item.background for item in starting)
+        for item in self._items:
+            if waiting <= 0:
+                break
+            if item.state == RUNNING and item.background and item._stop_as is None:
+                item._stop_as = QUEUED
+                item._cancel_event.set()
+                waiting -= 1
+
+    def _schedule(self):
+        with self._lock:
+            if not self._started:
+                return
+            starting = self._next_items()
+            for item in starting:
+                item.state = RUNNING
+                item._cancel_event = threading.Event()
+                item._stop_as = None
+            if starting:
+                self._save()
+            self._preempt(starting)
+        for item in starting:
+            self._notify(item)
+            threading.Thread(target=self._run, args=(item,), name=f"queue-{item.name}", daemon=True).start()
+
+    def _run(self, item):
+        from installer import install
+        from downloader import DEFAULT_MAX_WORKERS
+        from progress import ProgressTracker
+
+        def on_progress(event):
+            if event.name is None:
+                item.progress = event
+            self._notify(item, event)
+
+        error = None
+
+        def do_install():
+            nonlocal error
+            if item.background:
+                lower_thread_priority()
+            try:
+                install(
+                    config.get("download_dir"), item.release,
+                    max_workers=config.get("download_workers", DEFAULT_MAX_WORKERS),
+                    progress=ProgressTracker(item.name, listeners=[on_progress]),
+                    dedupe=config.get("dedupe", False),
+                    delta=config.get("delta_updates", True),
+                    cancel_event=item._cancel_event,
+                )
+            except Exception as e:
+                error = e
+
+        if item.background:
+            # New threads inherit the nice value and an unprivileged thread can't raise it again,
+            # so only a throwaway thread is lowered. This one keeps its priority for the next items.
+            worker = threading.Thread(target=do_install, name=f"queue-{item.name}-background", daemon=True)
+            worker.start()
+            worker.join()
+        else:
+            do_install()
+
+        with self._lock:
+            if error is None:
+                item.state = DONE
+                if item.background:
+                    from prefetch import mark_ready
+
+                    mark_ready(item.release)
+            elif item._stop_as is not None:
+                item.state = item._stop_as
+            else:
+                item.state = FAILED
+                item.error = str(error)
+                print(f"Queued download of {item.name} failed: {error}")
+            item._cancel_event = None
+            self._save()
+        if item.state == CANCELLED:
+            self._discard(item)
+        self._notify(item)
+        self._schedule()
+
+    def _discard(self, item):
+        from installer import discard_partial
+
+        discard_partial(config.get("download_dir"), item.name)
+
+
+def format_item(item):
+    """One line description of a queue item for the queue window and the CLI"""
+    from progress import format_event
+
+    text = f"{item.name}: {item.state}"
+    if item.priority:
+        text += f", priority {item.priority}"
+    if item.state == RUNNING and item.progress is not None:
+        text += f" - {format_event(item.progress)}"
+    elif item.error:
+        text += f" - {item.error}"
+    return text
+
+
+queue = DownloadQueue()
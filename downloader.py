@@ -0,0 +1,316 @@
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import transport
+import yaml_io
+from config_store import atomic_write_yaml
+from object_store import hash_file, HASH_BUFFER_SIZE
+
+DEFAULT_MAX_WORKERS = 4
+MIN_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 4 * 1024 * 1024
+# Grow the chunk while a full read finishes faster than this
+FAST_READ_SECONDS = 0.05
+
+
+class DownloadError(Exception):
+    """Raised when one or more files of a batch failed, failures is a list of (name, exception)"""
+
+    def __init__(self, failures):
+        self.failures = failures
+        lines = [f"{name}: {error}" for name, error in failures]
+        super().__init__(f"{len(failures)} file(s) failed to download:\n" + "\n".join(lines))
+
+
+class DownloadCancelled(Exception):
+    pass
+
+
+class ChecksumMismatch(IOError):
+    pass
+
+
+class TokenBucket:
+    """Shared bandwidth limit: consume() sleeps the calling thread until its bytes fit into rate bytes/s"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self._tokens = rate
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            # Going into debt keeps the threads in order, each one waits until its debt is paid off
+            self._tokens -= amount
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+    def chunk_limit(self):
+        """Largest read that still lets the limit be enforced smoothly (about 10 per second)"""
+        return max(MIN_CHUNK_SIZE, min(MAX_CHUNK_SIZE, int(self.rate // 10)))
+
+
+_bandwidth = None
+
+
+def set_bandwidth_limit(bytes_per_second):
+    """Limit all downloads together to bytes_per_second, 0 or None removes the limit"""
+    global _bandwidth
+    _bandwidth = TokenBucket(bytes_per_second) if bytes_per_second else None
+
+
+class DownloadJob:
+    def __init__(self, name, url, dest, reuse_existing=False, expected_sha256=None, size=None):
+        self.name = name
+        self.url = url
+        self.dest = dest
+        # Keep a finished dest from an earlier attempt instead of fetching it again
+        self.reuse_existing = reuse_existing
+        self.expected_sha256 = expected_sha256
+        # Expected size until the response tells the real one, lets progress show totals up front
+        self.size = size
+        self.done = 0
+        self.sha256 = None  # filled in while the bytes stream to disk
+
+
+def _max_chunk_size():
+    bandwidth = _bandwidth
+    return bandwidth.chunk_limit() if bandwidth is not None else MAX_CHUNK_SIZE
+
+
+def iter_adaptive_chunks(raw, max_chunk_size=_max_chunk_size):
+    """
+    Read a urllib3 response in chunks that grow while the connection keeps up.
+    max_chunk_size() is asked before every read, so a new bandwidth limit applies at once.
+    """
+    chunk_size = min(MIN_CHUNK_SIZE, max_chunk_size())
+    while True:
+        chunk_size = min(chunk_size, max_chunk_size())
+        started = time.monotonic()
+        chunk = raw.read(chunk_size, decode_content=True)
+        if not chunk:
+            return
+        yield chunk
+        elapsed = time.monotonic() - started
+        if len(chunk) == chunk_size and elapsed < FAST_READ_SECONDS:
+            chunk_size = chunk_size * 2
+        elif elapsed > FAST_READ_SECONDS * 8:
+            chunk_size = max(chunk_size // 2, MIN_CHUNK_SIZE)
+
+
+def _read_sidecar(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return yaml_io.load(f) or {}
+    except (OSError, yaml_io.YAMLError):
+        return {}
+
+
+def _resume_headers(job, part_path, sidecar_path):
+    """Range headers to continue an earlier .part file, or {} if it has to start over"""
+    meta = _read_sidecar(sidecar_path)
+    validator = meta.get("etag") or meta.get("last_modified")
+    try:
+        offset = os.path.getsize(part_path)
+    except OSError:
+        return {}
+    if meta.get("url") != job.url or not validator or offset <= 0:
+        return {}
+    job.done = offset
+    return {"Range": f"bytes={offset}-", "If-Range": validator}
+
+
+def _content_range_start(header):
+    # "bytes 100-199/200"
+    try:
+        return int(header.split()[1].split("-")[0])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def download_file(job, progress=None, cancel_event=None):
+    """
+    Stream job.url to job.dest, progress is called with (job) after every chunk.
+    Data goes to job.dest + ".part" with a small .part.yml sidecar holding the ETag/Last-Modified
+    and offset, so a later attempt continues with a Range request if the server allows it.
+    """
+    if cancel_event is not None and cancel_event.is_set():
+        raise DownloadCancelled(f"{job.name} cancelled")
+    part_path = job.dest + ".part"
+    sidecar_path = part_path + ".yml"
+    if job.reuse_existing and os.path.exists(job.dest) and not os.path.exists(part_path):
+        job.sha256 = hash_file(job.dest)
+        if not job.expected_sha256 or job.sha256 == job.expected_sha256:
+            job.size = job.done = os.path.getsize(job.dest)
+            if progress:
+                progress(job)
+            return job
+        os.remove(job.dest)
+    job.done = 0
+    headers = _resume_headers(job, part_path, sidecar_path)
+
+    with transport.get(job.url, stream=True, headers=headers) as r:
+        if r.status_code == 416 and headers:
+            # Nothing left to fetch if the .part already has the whole file
+            total = (r.headers.get("Content-Range") or "").rpartition("/")[2]
+            if total.isdigit() and int(total) == job.done:
+                job.size = job.done
+                job.sha256 = hash_file(part_path)
+                _finish(job, part_path, sidecar_path)
+                return job
+            # The .part doesn't belong to the remote file anymore
+            _discard_part(part_path, sidecar_path)
+            return download_file(job, progress, cancel_event)
+        r.raise_for_status()
+
+        resumed = r.status_code == 206 and _content_range_start(r.headers.get("Content-Range")) == job.done
+        if r.status_code == 206 and not resumed:
+            # A part of the file, but not the one after our .part: neither can be used
+            if not headers:
+                raise IOError(f"Server sent only a part of {job.name}")
+            print(f"Server sent the wrong range for {job.name}, starting over")
+            _discard_part(part_path, sidecar_path)
+            return download_file(job, progress, cancel_event)
+        if headers and not resumed:
+            print(f"Server can't resume {job.name}, starting over")
+            job.done = 0
+        length = r.headers.get("Content-Length")
+        job.size = job.done + int(length) if length and length.isdigit() else None
+
+        atomic_write_yaml(sidecar_path, {
+            "url": job.url,
+            "etag": r.headers.get("ETag"),
+            "last_modified": r.headers.get("Last-Modified"),
+            "size": job.size,
+            "offset": job.done,
+        })
+        digest = hashlib.sha256()
+        if resumed:
+            print(f"Resuming {job.name} at byte {job.done}")
+            # The bytes from the earlier attempt are hashed once, the rest is hashed in flight
+            _hash_into(digest, part_path, job.done)
+
+        with open(part_path, "r+b" if resumed else "wb") as f:
+            f.seek(job.done)
+            f.truncate()
+            try:
+                for chunk in iter_adaptive_chunks(r.raw):
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise DownloadCancelled(f"{job.name} cancelled")
+                    # Looked up per chunk, so a limit set in the meantime also slows running downloads
+                    bandwidth = _bandwidth
+                    if bandwidth is not None:
+                        bandwidth.consume(len(chunk))
+                    f.write(chunk)
+                    digest.update(chunk)
+                    job.done += len(chunk)
+                    if progress:
+                        progress(job)
+            finally:
+                f.flush()
+                _update_sidecar_offset(sidecar_path, job.done)
+
+    if job.size is not None and job.done != job.size:
+        raise IOError(f"{job.name} is incomplete ({job.done} of {job.size} bytes)")
+    job.sha256 = digest.hexdigest()
+    _finish(job, part_path, sidecar_path)
+    return job
+
+
+def _hash_into(digest, path, length):
+    with open(path, "rb") as f:
+        while length > 0:
+            chunk = f.read(min(HASH_BUFFER_SIZE, length))
+            if not chunk:
+                break
+            digest.update(chunk)
+            length -= len(chunk)
+
+
+def _check_digest(job):
+    if job.expected_sha256 and job.sha256 != job.expected_sha256:
+        raise ChecksumMismatch(f"{job.name} is corrupt (sha256 {job.sha256}, expected {job.expected_sha256})")
+
+
+def _finish(job, part_path, sidecar_path):
+    """Move a complete .part into place, a corrupt one is thrown away so the next try starts fresh"""
+    try:
+        _check_digest(job)
+    except ChecksumMismatch:
+        _discard_part(part_path, sidecar_path)
+        raise
+    os.replace(part_path, job.dest)
+    os.remove(sidecar_path)
+
+
+def _update_sidecar_offset(sidecar_path, offset):
+    meta = _read_sidecar(sidecar_path)
+    if meta:
+        meta["offset"] = offset
+        atomic_write_yaml(sidecar_path, meta)
+
+
+def _discard_part(part_path, sidecar_path):
+    for path in (part_path, sidecar_path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class _BatchCancel:
+    """Cancel flag of one download_many batch: set by a failed job or through the caller's cancel_event"""
+
+    def __init__(self, outer=None):
+        self.outer = outer
+        self._failed = threading.Event()
+
+    def set(self):
+        self._failed.set()
+
+    def is_set(self):
+        return self._failed.is_set() or (self.outer is not None and self.outer.is_set())
+
+
+def download_many(jobs, max_workers=DEFAULT_MAX_WORKERS, progress=None, cancel_event=None):
+    """
+    Download all jobs in parallel with at most max_workers connections.
+    The first failed job cancels the rest of the batch, as the release can't be installed
+    anyway, and a DownloadError listing the root failures is raised once every job stopped.
+    progress is called with every job once before the downloads start, so it knows all of
+    them. Setting cancel_event stops the batch too; the batch never sets it, so other work
+    sharing the event goes on. Unfinished files stay as .part files to be resumed later.
+    """
+    if not jobs:
+        return []
+    if progress:
+        for job in jobs:
+            progress(job)
+    cancel = _BatchCancel(cancel_event)
+    failures = []
+    workers = max(1, min(int(max_workers or DEFAULT_MAX_WORKERS), len(jobs)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="download") as pool:
+        futures = {pool.submit(download_file, job, progress, cancel): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                future.result()
+                print(f"Downloaded {job.name} ({job.done} bytes)")
+            except Exception as e:
+                print(f"Download of {job.name} failed: {e}")
+                failures.append((job.name, e))
+                # No point in finishing the rest, the release can't be installed anyway
+                cancel.set()
+    if failures:
+        # Only report the root causes, not the jobs that got cancelled because of them
+        real = [(n, e) for n, e in failures if not isinstance(e, DownloadCancelled)]
+        raise DownloadError(real or failures)
+    return jobs
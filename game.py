@@ -0,0 +1,102 @@
+import os
+import platform
+import threading
+
+import yaml_io
+
+MODES = ("host", "join")
+
+# version.yml path -> ((mtime_ns, size), validated version-data)
+_version_data_cache = {}
+_version_data_lock = threading.Lock()
+
+
+class VersionDataError(ValueError):
+    """version.yml doesn't match the schema the start screen expects"""
+
+
+def game_dir(download_dir, version):
+    return os.path.join(download_dir, version, "source")
+
+
+def game_executable(download_dir, version):
+    """Path of the precompiled game binary of a version, main.exe on Windows and main elsewhere"""
+    name = "main.exe" if platform.system() == "Windows" else "main"
+    return os.path.join(game_dir(download_dir, version), name)
+
+
+def build_command(game_exe, mode, arg):
+    """
+    mode: "host" or "join"
+    arg: port number for host mode, or join link for join mode
+    """
+    if mode not in MODES:
+        raise ValueError(f"Invalid mode: {mode}")
+    return [game_exe, mode, str(arg)]
+
+
+def version_file(download_dir, version):
+    return os.path.join(game_dir(download_dir, version), "version.yml")
+
+
+def validate_version_data(data):
+    """Check a parsed version.yml and return its version-data section, raises VersionDataError"""
+    version_data = data.get("version-data") if isinstance(data, dict) else None
+    if not isinstance(version_data, dict):
+        raise VersionDataError("version.yml has no version-data section")
+    if not isinstance(version_data.get("standart-mode"), str):
+        raise VersionDataError("version-data has no standart-mode")
+    start_args = version_data.get("start-args")
+    if not isinstance(start_args, dict):
+        raise VersionDataError("version-data has no start-args")
+    for key, config_data in start_args.items():
+        if not isinstance(config_data, dict) or "type" not in config_data:
+            raise VersionDataError(f"start-args entry {key} has no type")
+        if config_data["type"] != "optionmenu":
+            continue
+        modes = config_data.get("args")
+        if not isinstance(modes, dict) or not modes:
+            raise VersionDataError(f"optionmenu {key} has no modes")
+        if version_data["standart-mode"] not in modes:
+            raise VersionDataError(f"standart-mode {version_data['standart-mode']!r} is not a mode of optionmenu {key}")
+        for mode, mode_args in modes.items():
+            if not isinstance(mode_args, dict):
+                raise VersionDataError(f"mode {mode} of optionmenu {key} has no args")
+            for arg_key, arg_data in mode_args.items():
+                if not isinstance(arg_data, dict) or "type" not in arg_data:
+                    raise VersionDataError(f"arg {arg_key} of mode {mode} has no type")
+                if arg_data["type"] == "entry" and not {"name", "standard"} <= arg_data.keys():
+                    raise VersionDataError(f"entry {arg_key} of mode {mode} needs a name and a standard value")
+    return version_data
+
+
+def load_version_data(download_dir, version):
+    """
+    The validated version-data section of a version's version.yml.
+    Parsed and validated once per file, later calls are served from memory until its mtime changes.
+    Raises OSError if the file is missing and VersionDataError if it is invalid.
+    """
+    path = version_file(download_dir, version)
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _version_data_lock:
+        cached = _version_data_cache.get(path)
+        if cached and cached[0] == stamp:
+            return cached[1]
+    try:
+        version_data = validate_version_data(yaml_io.load_file(path))
+    except yaml_io.YAMLError as e:
+        raise VersionDataError(f"version.yml can't be parsed: {e}") from e
+    with _version_data_lock:
+        _version_data_cache[path] = (stamp, version_data)
+    return version_data
+
+
+def default_arg(version_data, mode):
+    """The standard value of the first entry for mode in the start-args of version.yml"""
+    for config_data in version_data["start-args"].values():
+        if config_data["type"] == "optionmenu":
+            for arg_data in config_data["args"].get(mode, {}).values():
+                if arg_data["type"] == "entry":
+                    return str(arg_data["standard"])
+    return ""
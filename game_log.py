@@ -0,0 +1,156 @@
+import collections
+import itertools
+import os
+import shutil
+import sys
+import threading
+import time
+
+from config_store import config, get_launcher_dir
+
+LOG_DIR_NAME = "logs"
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_BACKUPS = 3
+DEFAULT_SESSIONS_KEPT = 20
+RING_SIZE = 2000
+FLUSH_SECONDS = 0.5
+# One log folder per version and launcher run
+SESSION = time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+
+
+def log_dir_for(version, session=SESSION):
+    return os.path.join(get_launcher_dir(), LOG_DIR_NAME, version, session)
+
+
+def prune_sessions(version, keep):
+    """Remove the oldest session folders of a version, the current session is always kept"""
+    directory = os.path.dirname(log_dir_for(version))
+    try:
+        sessions = sorted(n for n in os.listdir(directory) if n != SESSION)
+    except OSError:
+        return
+    for name in sessions[:max(0, len(sessions) - keep + 1)]:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+class RotatingLog:
+    """Append-only text file that is rotated to .1, .2, ... when it grows over max_bytes"""
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES, backups=DEFAULT_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._size = self._file.tell()
+        self._last_flush = time.monotonic()
+
+    def write(self, text):
+        if self._size + len(text) > self.max_bytes and self._size:
+            self._rotate()
+        self._file.write(text)
+        self._size += len(text)
+        now = time.monotonic()
+        if now - self._last_flush > FLUSH_SECONDS:
+            self._file.flush()
+            self._last_flush = now
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._size = 0
+
+    def close(self):
+        self._file.close()
+
+
+class GameLog:
+    """
+    Captures stdout and stderr of one game process. A reader thread per pipe writes every
+    line with a timestamp to a size-rotated log file in logs/<version>/<session>/ and keeps
+    the most recent lines in a ring buffer the log window reads from, so the UI never touches
+    the pipes.
+    """
+
+    def __init__(self, version, mode, pid, echo=False):
+        directory = log_dir_for(version)
+        if not os.path.isdir(directory):
+            prune_sessions(version, config.get("log_sessions_kept", DEFAULT_SESSIONS_KEPT))
+        self.path = os.path.join(directory, f"{mode}-{pid}.log")
+        self.echo = echo
+        self._log = RotatingLog(
+            self.path,
+            max_bytes=config.get("log_max_bytes", DEFAULT_MAX_BYTES),
+            backups=config.get("log_backups", DEFAULT_BACKUPS),
+        )
+        self._lock = threading.Lock()
+        self._lines = collections.deque(maxlen=RING_SIZE)
+        self._seq = 0
+        self._open_streams = 0
+        # Set once a write to the log file failed (e.g. the disk is full), the ring buffer keeps going
+        self._log_failed = False
+
+    def attach(self, popen):
+        """Start reading popen's stdout and stderr pipes"""
+        for stream, tag in ((popen.stdout, "out"), (popen.stderr, "err")):
+            if stream is None:
+                continue
+            self._open_streams += 1
+            threading.Thread(
+                target=self._read, args=(stream, tag), name=f"game-log-{popen.pid}-{tag}", daemon=True,
+            ).start()
+
+    def _read(self, stream, tag):
+        """
+        Drain stream until the game closes it. Failing to log or echo a line never stops the
+        reading, the game would block on a full pipe or die of SIGPIPE otherwise.
+        """
+        echo_to = sys.stderr if tag == "err" else sys.stdout
+        try:
+            for raw in iter(stream.readline, b""):
+                line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+                stamp = time.strftime("%H:%M:%S")
+                with self._lock:
+                    self._seq += 1
+                    self._lines.append((self._seq, tag, line))
+                    if not self._log_failed:
+                        try:
+                            self._log.write(f"{stamp} {tag} | {line}\n")
+                        except (OSError, ValueError) as e:
+                            self._log_failed = True
+                            print(f"Stopped writing {self.path}: {e}", file=sys.stderr)
+                if self.echo:
+                    try:
+                        print(line, file=echo_to, flush=True)
+                    except (OSError, ValueError):
+                        self.echo = False
+        except (OSError, ValueError):
+            pass
+        finally:
+            stream.close()
+            with self._lock:
+                self._open_streams -= 1
+                if self._open_streams == 0:
+                    try:
+                        self._log.close()
+                    except OSError:
+                        pass
+
+    def lines_since(self, seq=0, limit=None):
+        """
+        ([(seq, tag, line), ...], last seq) of the buffered lines after seq, at most the newest
+        limit of them. Lines that already dropped out of the ring buffer are skipped.
+        """
+        with self._lock:
+            # seq numbers are consecutive, so the new lines are the last (newest seq - seq) entries
+            count = min(self._seq - seq, len(self._lines))
+            if limit is not None:
+                count = min(count, limit)
+            lines = list(itertools.islice(self._lines, len(self._lines) - count, None))
+            last = self._seq
+        return lines, last
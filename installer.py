@@ -0,0 +1,459 @@
+import hashlib
+import os
+import shutil
+import stat
+import time
+import zipfile
+from urllib.parse import quote
+
+import game
+import progress as progress_events
+import transport
+import verify
+import version_index
+import yaml_io
+from config_store import GITHUB_RAW, OWNER, REPO
+from downloader import DownloadJob, download_many, DEFAULT_MAX_WORKERS
+from object_store import dedupe_tree, format_size, hash_file
+
+PARTIAL_DIR_NAME = ".partial"
+STAGING_DIR_NAME = ".staging"
+MANIFEST_ASSET_NAME = "manifest.json"
+RAW_URL = f"{GITHUB_RAW}/{OWNER}/{REPO}"
+EXTRACT_BUFFER_SIZE = 1024 * 1024
+
+
+def _zipball_prefix(names):
+    """The OWNER-REPO-<sha>/ folder GitHub wraps every zipball in, or "" if there is none"""
+    if not names:
+        return ""
+    first = names[0].split("/", 1)[0] + "/"
+    if first.lower().startswith(f"{OWNER}-{REPO}".lower()) and all(n.startswith(first) for n in names):
+        return first
+    return ""
+
+
+def extract_zipball(zip_path, dest_dir, only=None, progress=None):
+    """
+    Extract a release zipball into dest_dir in one pass, dropping the top-level
+    OWNER-REPO-<sha>/ folder and keeping the Unix permission bits stored in the zip.
+    Files are hashed while they are written, returns their manifest like build_manifest.
+    only limits the extraction to a set of relative paths. A ProgressTracker as progress
+    gets the extract phase with the uncompressed bytes written.
+    """
+    files = {}
+    dest_root = os.path.realpath(dest_dir)
+    os.makedirs(dest_root, exist_ok=True)
+    with zipfile.ZipFile(zip_path, "r") as zip_ref:
+        infos = zip_ref.infolist()
+        prefix = _zipball_prefix([i.filename for i in infos])
+        if only is not None:
+            infos = [i for i in infos if i.filename[len(prefix):] in only]
+        progress_events.set_phase(progress, "extract", sum(i.file_size for i in infos))
+        for info in infos:
+            rel = info.filename[len(prefix):]
+            if not rel:
+                continue
+            target = os.path.realpath(os.path.join(dest_root, rel))
+            if os.path.commonpath([dest_root, target]) != dest_root:
+                raise ValueError(f"Refusing to extract {info.filename} outside of {dest_dir}")
+
+            if info.is_dir():
+                os.makedirs(target, exist_ok=True)
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                digest = hashlib.sha256()
+                with zip_ref.open(info) as src, open(target, "wb") as dst:
+                    while True:
+                        chunk = src.read(EXTRACT_BUFFER_SIZE)
+                        if not chunk:
+                            break
+                        dst.write(chunk)
+                        digest.update(chunk)
+                        progress_events.advance(progress, len(chunk))
+
+            # Unix permissions live in the high 16 bits of external_attr
+            mode = (info.external_attr >> 16) & 0o7777
+            if info.create_system == 3 and mode:
+                os.chmod(target, mode)
+            if not info.is_dir():
+                files[rel] = _manifest_entry(target, digest.hexdigest())
+    return files
+
+
+def _manifest_entry(path, sha256):
+    st = os.stat(path)
+    return {"sha256": sha256, "size": st.st_size, "mode": stat.S_IMODE(st.st_mode)}
+
+
+def partial_dir_for(save_dir, release_name):
+    """Hidden folder in download_dir where the .part files of an unfinished download live"""
+    return os.path.join(save_dir, PARTIAL_DIR_NAME, release_name)
+
+
+def staging_dir_for(save_dir, release_name):
+    """Hidden folder in download_dir where a version is assembled before it is moved into place"""
+    return os.path.join(save_dir, STAGING_DIR_NAME, release_name)
+
+
+def _remove_partial_dir(partial_dir):
+    shutil.rmtree(partial_dir, ignore_errors=True)
+    try:
+        os.rmdir(os.path.dirname(partial_dir))
+    except OSError:
+        pass  # other downloads still in progress
+
+
+def discard_partial(save_dir, release_name):
+    """Throw away what an interrupted download of release_name left behind"""
+    _remove_partial_dir(partial_dir_for(save_dir, release_name))
+    _remove_partial_dir(staging_dir_for(save_dir, release_name))
+
+
+def _commit_staged(save_dir, release_name, progress=None):
+    """
+    Verify the version assembled in the staging folder against its manifest and rename it to
+    save_dir/release_name. A rename within download_dir is atomic, so the version folder either
+    doesn't exist yet or is complete. An installed version of the same name is swapped out with
+    a second rename and removed afterwards. Returns the version folder.
+    """
+    staged_dir = staging_dir_for(save_dir, release_name)
+    progress_events.set_phase(progress, "verify")
+    broken = verify.broken_versions(verify.verify_versions(os.path.dirname(staged_dir), names=[release_name]))
+    if broken:
+        raise IOError(f"Install of {release_name} failed verification: {verify.format_report(broken)}")
+
+    version_dir = os.path.join(save_dir, release_name)
+    if os.path.exists(version_dir):
+        replaced_dir = f"{staged_dir}.replaced-{os.getpid()}"
+        os.rename(version_dir, replaced_dir)
+        os.rename(staged_dir, version_dir)
+        shutil.rmtree(replaced_dir, ignore_errors=True)
+    else:
+        os.rename(staged_dir, version_dir)
+    _remove_partial_dir(staged_dir)
+    return version_dir
+
+
+def install_release(save_dir, release_name, zip_url, assets, max_workers=DEFAULT_MAX_WORKERS, progress=None,
+                    dedupe=False, cancel_event=None):
+    """
+    Download the source zipball and all assets of a release in parallel and install them to
+    save_dir/release_name. Downloads land in a hidden .partial folder first and are kept there
+    if anything fails, so the next attempt resumes instead of starting from zero. The version is
+    assembled in the hidden .staging folder and only renamed into place once it verifies, so no
+    half-installed version is ever visible. With dedupe the files are hardlinked into the
+    content-addressed object store, sharing identical files with other versions.
+    """
+    partial_dir = partial_dir_for(save_dir, release_name)
+    os.makedirs(partial_dir, exist_ok=True)
+
+    # --- Download source code and all assets at the same time ---
+    zip_path = os.path.join(partial_dir, f"{release_name}_source.zip")
+    zip_job = DownloadJob(f"{release_name}_source.zip", zip_url, zip_path, reuse_existing=True)
+    asset_jobs = [
+        DownloadJob(asset["name"], asset["browser_download_url"], os.path.join(partial_dir, asset["name"]),
+                    reuse_existing=True, size=asset.get("size"))
+        for asset in assets
+    ]
+    print(f"Downloading source code from: {zip_url}")
+    progress_events.set_phase(progress, "download")
+    download_many([zip_job] + asset_jobs, max_workers=max_workers, progress=progress, cancel_event=cancel_event)
+
+    staged_dir = staging_dir_for(save_dir, release_name)
+    # Whatever an interrupted attempt assembled is rebuilt from the downloads
+    shutil.rmtree(staged_dir, ignore_errors=True)
+
+    try:
+        source_dir = os.path.join(staged_dir, "source")
+        files = extract_zipball(zip_path, source_dir, progress=progress)
+
+        # Assets go next to the source, overwriting files of the same name
+        progress_events.set_phase(progress, "move", sum(job.done for job in asset_jobs))
+        for job in asset_jobs:
+            target = os.path.join(source_dir, job.name)
+            os.replace(job.dest, target)
+            files[job.name] = _manifest_entry(target, job.sha256)
+            progress_events.advance(progress, job.done)
+
+        progress_events.set_phase(progress, "metadata")
+        write_metadata(staged_dir, release_name, files)
+
+        if dedupe:
+            saved = dedupe_tree(save_dir, source_dir, digests=_digests_by_path(source_dir, files))
+            print(f"Deduplicated {release_name}, saved {format_size(saved)}")
+        version_dir = _commit_staged(save_dir, release_name, progress)
+    except BaseException:
+        _remove_partial_dir(staged_dir)
+        raise
+
+    # Remove the downloaded files after installation
+    _remove_partial_dir(partial_dir)
+    check_version_data(save_dir, release_name)
+    version_index.index.add(save_dir, release_name)
+    progress_events.set_phase(progress, "done")
+
+    return version_dir
+
+
+def check_version_data(save_dir, release_name):
+    """Validate the version.yml of a fresh install once, so the start screen can trust the cached copy"""
+    try:
+        game.load_version_data(save_dir, release_name)
+    except FileNotFoundError:
+        print(f"{release_name} has no version.yml, it can't be started from the launcher")
+    except (OSError, game.VersionDataError) as e:
+        print(f"Invalid version.yml in {release_name}: {e}")
+
+
+def write_metadata(version_dir, release_name, files=None):
+    """metadata.yml of a version, files is the per-file manifest used by verify and delta updates"""
+    data = {
+        "metadata": {"version": release_name, "installed_at": time.time()}
+    }
+    if files is not None:
+        data["metadata"]["files"] = files
+    config_file = os.path.join(version_dir, "metadata.yml")
+    with open(config_file, "w", encoding="utf-8") as f:
+        yaml_io.dump(data, f)
+
+
+def install(save_dir, release, max_workers=DEFAULT_MAX_WORKERS, progress=None, dedupe=False, delta=True,
+            cancel_event=None):
+    """
+    Install a release (as returned by releases.parse_release), as delta update on top of the
+    newest installed version when the release has a manifest, else as full download.
+    Setting cancel_event aborts the download with DownloadError, what was fetched so far is
+    kept in the .partial folder for the next attempt.
+    """
+    release_name = release["name"]
+    base_dir = newest_installed_version(save_dir, exclude=release_name)
+    if delta and base_dir:
+        try:
+            version_dir, stats = install_release_delta(
+                save_dir, release_name, release["tag_name"], release["assets"], base_dir,
+                max_workers=max_workers, progress=progress, dedupe=dedupe, cancel_event=cancel_event,
+            )
+            print(f"Delta update: reused {stats['reused']} files, downloaded {stats['fetched']} "
+                  f"({format_size(stats['fetched_bytes'])})")
+            return version_dir
+        except NoManifest as e:
+            print(f"{e}, doing a full download")
+    return install_release(
+        save_dir, release_name, release["zipball_url"], release["assets"],
+        max_workers=max_workers, progress=progress, dedupe=dedupe, cancel_event=cancel_event,
+    )
+
+
+# --- Delta updates ---
+
+class NoManifest(Exception):
+    """The release doesn't publish a manifest.json asset, only a full download is possible"""
+
+
+def build_manifest(source_dir):
+    """{relative posix path: {"sha256", "size", "mode"}} for every file below source_dir"""
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(source_dir):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            if os.path.islink(path):
+                continue
+            rel = os.path.relpath(path, source_dir).replace(os.sep, "/")
+            files[rel] = _manifest_entry(path, hash_file(path))
+    return files
+
+
+def _digests_by_path(source_dir, files):
+    return {os.path.join(source_dir, *rel.split("/")): entry["sha256"] for rel, entry in files.items()}
+
+
+def read_manifest(version_dir):
+    """Manifest of an installed version, from metadata.yml if recorded there, else by hashing it"""
+    files = verify.read_recorded_manifest(version_dir)
+    if files:
+        return files
+    return build_manifest(os.path.join(version_dir, "source"))
+
+
+def newest_installed_version(save_dir, exclude=None):
+    """Folder of the most recently installed version in save_dir, or None"""
+    newest = None
+    newest_time = None
+    for name in os.listdir(save_dir) if os.path.isdir(save_dir) else []:
+        meta = os.path.join(save_dir, name, "metadata.yml")
+        if name.startswith(".") or name == exclude or not os.path.exists(meta):
+            continue
+        mtime = os.path.getmtime(meta)
+        if newest_time is None or mtime > newest_time:
+            newest, newest_time = os.path.join(save_dir, name), mtime
+    return newest
+
+
+def fetch_release_manifest(assets):
+    """The manifest a release publishes as asset, raises NoManifest if there is none"""
+    for asset in assets:
+        if asset["name"] == MANIFEST_ASSET_NAME:
+            res = transport.get(asset["browser_download_url"])
+            res.raise_for_status()
+            return res.json()["files"]
+    raise NoManifest(f"Release has no {MANIFEST_ASSET_NAME}")
+
+
+def _reuse_base_file(src, dest, sha256, dedupe):
+    """
+    Hardlink (dedupe) or copy an unchanged file of the base version to dest. The base manifest
+    only says what the file should be, so it is hashed first: returns False if it doesn't match.
+    """
+    if os.path.exists(dest):
+        # Left by an interrupted attempt
+        if hash_file(dest) == sha256:
+            return True
+        os.remove(dest)
+    try:
+        if hash_file(src) != sha256:
+            return False
+    except OSError:
+        return False
+    if dedupe:
+        os.link(src, dest)
+    else:
+        shutil.copy2(src, dest)
+    return True
+
+
+def install_release_delta(save_dir, release_name, tag_name, assets, base_version_dir,
+                          max_workers=DEFAULT_MAX_WORKERS, progress=None, dedupe=False, cancel_event=None):
+    """
+    Install a release by reusing the unchanged files of base_version_dir and downloading only
+    new or changed ones, compared through the manifest.json the release publishes.
+    Changed source files come from raw.githubusercontent.com at the release tag, changed assets
+    from their download URL. Raises NoManifest if the release has no manifest, the caller
+    should fall back to install_release then. The new version is assembled and verified in the
+    staging folder like a full install.
+    Returns (version_dir, {"reused", "fetched", "fetched_bytes"}).
+    """
+    target = fetch_release_manifest(assets)
+    base = read_manifest(base_version_dir)
+    base_source = os.path.join(base_version_dir, "source")
+    asset_urls = {a["name"]: a["browser_download_url"] for a in assets if a["name"] != MANIFEST_ASSET_NAME}
+
+    partial_dir = partial_dir_for(save_dir, release_name)
+    new_source = os.path.join(partial_dir, "source")
+    os.makedirs(new_source, exist_ok=True)
+
+    jobs = []
+    reused = 0
+    for rel, entry in target.items():
+        dest = os.path.join(new_source, *rel.split("/"))
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        old = base.get(rel)
+        if old and old["sha256"] == entry["sha256"]:
+            if _reuse_base_file(os.path.join(base_source, *rel.split("/")), dest, entry["sha256"], dedupe):
+                reused += 1
+                continue
+            print(f"{rel} of {os.path.basename(base_version_dir)} is missing or corrupt, downloading it")
+        url = asset_urls.get(rel) or f"{RAW_URL}/{quote(tag_name)}/{quote(rel)}"
+        jobs.append(DownloadJob(rel, url, dest, reuse_existing=True, expected_sha256=entry["sha256"],
+                                size=entry.get("size")))
+
+    print(f"Delta update to {release_name}: reusing {reused} files, downloading {len(jobs)}")
+    progress_events.set_phase(progress, "download")
+    download_many(jobs, max_workers=max_workers, progress=progress, cancel_event=cancel_event)
+
+    # Downloads are checked against the manifest hashes while they stream in
+    progress_events.set_phase(progress, "move")
+    for job in jobs:
+        if target[job.name].get("mode"):
+            os.chmod(job.dest, target[job.name]["mode"])
+
+    staged_dir = staging_dir_for(save_dir, release_name)
+    shutil.rmtree(staged_dir, ignore_errors=True)
+    os.makedirs(staged_dir)
+    source_dir = os.path.join(staged_dir, "source")
+    os.rename(new_source, source_dir)
+    try:
+        progress_events.set_phase(progress, "metadata")
+        write_metadata(staged_dir, release_name, target)
+        if dedupe:
+            dedupe_tree(save_dir, source_dir, digests=_digests_by_path(source_dir, target))
+        version_dir = _commit_staged(save_dir, release_name, progress)
+    except BaseException:
+        _remove_partial_dir(staged_dir)
+        raise
+
+    _remove_partial_dir(partial_dir)
+    check_version_data(save_dir, release_name)
+    version_index.index.add(save_dir, release_name)
+    progress_events.set_phase(progress, "done")
+
+    return version_dir, {
+        "reused": reused,
+        "fetched": len(jobs),
+        "fetched_bytes": sum(job.done for job in jobs),
+    }
+
+
+# --- Repair ---
+
+def repair_version(save_dir, folder, zip_url, assets, max_workers=DEFAULT_MAX_WORKERS, progress=None):
+    """
+    Re-fetch only the files of an installed version that fail verification against the manifest
+    in its metadata.yml. Broken assets are downloaded again, broken source files are extracted
+    one by one from the release zipball. Both land in the .partial folder and are checked against
+    the manifest before they replace the broken files, so the live version (and, with dedupe, the
+    versions sharing a hardlinked file) is never written to. Returns {"repaired": [...],
+    "missing_from_release": [...]}.
+    """
+    version_dir = os.path.join(save_dir, folder)
+    files = verify.read_recorded_manifest(version_dir)
+    if not files:
+        raise ValueError(f"{folder} has no recorded manifest, download it again instead")
+    report = verify.verify_versions(save_dir, names=[folder], workers=max_workers)[folder]
+    broken = report["missing"] + report["corrupted"]
+    result = {"repaired": [], "missing_from_release": []}
+    if not broken:
+        return result
+
+    source_dir = os.path.join(version_dir, "source")
+    partial_dir = partial_dir_for(save_dir, folder)
+    fixed_dir = os.path.join(partial_dir, "source")
+    os.makedirs(fixed_dir, exist_ok=True)
+    asset_urls = {a["name"]: a["browser_download_url"] for a in assets}
+    asset_jobs = [
+        DownloadJob(rel, asset_urls[rel], os.path.join(fixed_dir, *rel.split("/")),
+                    expected_sha256=files[rel]["sha256"])
+        for rel in broken if rel in asset_urls
+    ]
+    source_files = {rel for rel in broken if rel not in asset_urls}
+
+    jobs = list(asset_jobs)
+    zip_path = os.path.join(partial_dir, f"{folder}_source.zip")
+    if source_files:
+        jobs.append(DownloadJob(f"{folder}_source.zip", zip_url, zip_path, reuse_existing=True))
+    print(f"Repairing {folder}: {len(asset_jobs)} assets, {len(source_files)} source files")
+    download_many(jobs, max_workers=max_workers, progress=progress)
+
+    # Assets are checked against the manifest hashes while they stream in
+    fixed = [job.name for job in asset_jobs]
+    if source_files:
+        extracted = extract_zipball(zip_path, fixed_dir, only=source_files)
+        for rel in sorted(source_files):
+            if rel not in extracted:
+                result["missing_from_release"].append(rel)
+            elif extracted[rel]["sha256"] != files[rel]["sha256"]:
+                raise IOError(f"{rel} in the release zipball doesn't match the recorded manifest")
+            else:
+                fixed.append(rel)
+
+    # A rename replaces the directory entry, a hardlink to the broken file is left to its other versions
+    for rel in fixed:
+        src = os.path.join(fixed_dir, *rel.split("/"))
+        target = os.path.join(source_dir, *rel.split("/"))
+        os.chmod(src, files[rel]["mode"])
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(src, target)
+        result["repaired"].append(rel)
+
+    _remove_partial_dir(partial_dir)
+    return result
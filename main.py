@@ -1,93 +1,82 @@
 import customtkinter as ctk
 from tkinter import filedialog, messagebox
 import tkinter as tk
-import requests
 import threading
-import zipfile
 import os
-import yaml
 import shutil
-import subprocess
-import time
 import platform
+import sys
+import time
 
-# --- CONFIG ---
-OWNER = "jonasb2510"       # Hardcoded repo owner
-REPO = "first-go-game"   # Hardcoded repo name
-API_URL = f"https://api.github.com/repos/{OWNER}/{REPO}/releases"
-stop_threads = False
+from config_store import config, default_versions_dir, get_launcher_dir, OWNER, REPO
+from tk_dispatch import TkDispatcher
+from watcher import VersionWatcher
 
-def get_appdata_dir():
-    system = platform.system()
-
-    if system == "Windows":
-        base_dir = os.getenv("APPDATA", os.path.expanduser("~\\AppData\\Roaming"))
-    elif system == "Darwin":
-        base_dir = os.path.expanduser("~/Library/Application Support")
-    else:
-        base_dir = os.getenv("XDG_CONFIG_HOME", os.path.expanduser("~/.config"))
-
-    #appdata_path = os.path.join(base_dir, app_name)
-    #os.makedirs(base_dir, exist_ok=True)
-    return base_dir
-
-def get_config_data():
-    config_path = os.path.join(get_appdata_dir(), "first-go-game-launcher")#os.getenv("appdata")
-    os.makedirs(config_path, exist_ok=True)
-    config_file = os.path.join(config_path, "config.yml")
-    if not os.path.exists(config_file):
-        versions_path = os.path.join(config_path, "versions")
-        os.makedirs(versions_path, exist_ok=True)
-        try:
-            version = os.listdir(versions_path)[-1]
-        except Exception as e:
-            print("No version found normal on first launch!")
-            version = ""
-        data = {
-            "settings": {"download_dir": versions_path, "version": version}
-        }
-        with open(config_file, "w", encoding="utf-8") as f:
-            yaml.dump(data, f, allow_unicode=True)
-    else:
-        with open(config_file, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f)
-    return data
+version_watcher = None
+prefetcher = None
+STARTUP_PROBE_ENV = "LAUNCHER_STARTUP_PROBE"
+# Marks versions in the optionmenu that were prefetched and not played yet
+READY_SUFFIX = " (new)"
 
 def open_release_downloader(owner, repo):
     global root
     global windl
+    # The release machinery (requests, zipfile, ...) is only loaded once the Version Manager is opened
+    from downloader import DEFAULT_MAX_WORKERS
+    from installer import repair_version
+    from releases import cached_releases, revalidate_releases, RateLimited, FetchCancelled
+    import object_store
+    import verify
+    import version_index
+    import download_queue
+    import retention
+    import active_version
+    from progress_view import ProgressPanel
+
     releases = []
     versions = []
 
+    def show_releases(release_list, append=False):
+        if not append:
+            listbox.delete(0, "end")
+            releases.clear()
+        for release in release_list:
+            releases.append(release)
+            listbox.insert("end", release["name"])
+
     def fetch_releases():
-        # Clear previous releases
-        listbox.delete(0, "end")
-        releases.clear()
+        # Show the cached list right away, the request below only revalidates it
+        show_releases(cached_releases())
         
         # Disable button during fetch
         fetch_btn.configure(state="disabled", text="Fetching...")
+
+        def on_page(page, first_page):
+            # Every page goes into the listbox as soon as it arrives
+            ui.post(lambda: show_releases(page, append=not first_page))
         
         def do_fetch():
+            button_text = "Fetch Releases"
             try:
-                res = requests.get(API_URL, headers={"Accept": "application/vnd.github+json"})
-                res.raise_for_status()
-                data = res.json()
-                
-                for release in data:
-                    name = release["name"] or release["tag_name"]
-                    zip_url = release["zipball_url"]
-                    assets = release.get("assets", [])
-                    releases.append((name, zip_url, assets))
-                    listbox.insert("end", name)
+                release_list, changed = revalidate_releases(on_page=on_page, cancel_event=fetch_cancel)
                 
-                if not releases:
-                    messagebox.showinfo("Info", "No releases found.", parent=windl)
+                if not release_list:
+                    ui.post(lambda: messagebox.showinfo("Info", "No releases found.", parent=windl))
                     
+            except FetchCancelled:
+                return
+            except RateLimited as e:
+                print(e)
+                button_text = f"Rate limited, retry in {e.wait_minutes()} min"
+                if not releases:
+                    ui.post(lambda msg=str(e): messagebox.showwarning("Rate limited", msg, parent=windl))
             except Exception as e:
-                messagebox.showerror("Error", f"Failed to fetch releases: {str(e)}", parent=windl)
-            finally:
-                # Re-enable button
-                fetch_btn.configure(state="normal", text="Fetch Releases")
+                if releases:
+                    print(f"Failed to refresh releases, showing cached list: {e}")
+                else:
+                    ui.post(lambda msg=str(e): messagebox.showerror("Error", f"Failed to fetch releases: {msg}", parent=windl))
+            # Re-enable button
+            ui.post(lambda: fetch_btn.configure(state="normal", text=button_text))
         
         # Run fetch in separate thread to avoid blocking UI
         threading.Thread(target=do_fetch, daemon=True).start()
@@ -98,111 +87,51 @@ def open_release_downloader(owner, repo):
             messagebox.showerror("Error", "Please select a release", parent=windl)
             return
 
-        if selection[0] >= len(releases):
+        if selection[-1] >= len(releases):
             messagebox.showerror("Error", "Invalid selection", parent=windl)
             return
 
-        release_name, zip_url, assets = releases[selection[0]]
         #save_dir = filedialog.askdirectory(title="Select folder to save files")
         #os.makedirs("dl", exist_ok=True)
         #save_dir = os.path.join(os.getcwd(), "dl")
         if not save_dir:
             return
 
-        # Disable download button during download
-        download_btn.configure(state="disabled", text="Downloading...")
+        # Every selected release goes into the download queue, which installs them in the background
+        queue = get_download_queue()
+        for i in selection:
+            queue.add(releases[i])
 
-        def do_download():
-            try:
-                # Create release-specific directory
-                #release_dir = os.path.join(save_dir, f"{release_name}_release")
-                os.makedirs(save_dir, exist_ok=True)
-                version_dir = os.path.join(save_dir, release_name)
-                os.makedirs(version_dir, exist_ok=True)
-                
-                # --- Download and unzip source code ---
-                zip_path = os.path.join(version_dir, f"{release_name}_source.zip")
-                
-                print(f"Downloading source code from: {zip_url}")
-                with requests.get(zip_url, stream=True) as r:
-                    r.raise_for_status()
-                    with open(zip_path, "wb") as f:
-                        for chunk in r.iter_content(chunk_size=8192):
-                            f.write(chunk)
-
-                # Extract source code
-                source_dir = os.path.join(version_dir, "source")
-                with zipfile.ZipFile(zip_path, "r") as zip_ref:
-                    zip_ref.extractall(source_dir)
-
-                # Remove the zip file after extraction
-                os.remove(zip_path)
-
-                for a in os.listdir(source_dir):
-                    if a.lower().startswith(OWNER + "-" + REPO): #"JonasB2510-first-go-game"
-                        repo_folder = os.path.join(source_dir, a)
-                        for b in os.listdir(repo_folder):
-                            shutil.move(os.path.join(repo_folder, b), os.path.join(source_dir, b))
-                        os.rmdir(repo_folder)
-
-                # --- Download all assets ---
-                if assets:
-                    #assets_dir = os.path.join(version_dir, "assets")
-                    #os.makedirs(assets_dir, exist_ok=True)
-                    
-                    for asset in assets:
-                        asset_name = asset["name"]
-                        asset_url = asset["browser_download_url"]
-                        asset_path = os.path.join(source_dir, asset_name)
-                        
-                        print(f"Downloading asset: {asset_name}")
-                        with requests.get(asset_url, stream=True) as r:
-                            r.raise_for_status()
-                            with open(asset_path, "wb") as f:
-                                for chunk in r.iter_content(chunk_size=8192):
-                                    f.write(chunk)
-                
-                data = {
-                    "metadata": {"version": release_name}
-                }
-                config_file = os.path.join(version_dir, "metadata.yml")
-                with open(config_file, "w", encoding="utf-8") as f:
-                    yaml.dump(data, f, allow_unicode=True)
+    # The progress panel follows one queued release at a time, the queue window shows all of them
+    followed = [None]
 
-                messagebox.showinfo("Success", f"Downloaded release '{release_name}' to:\n{version_dir}", parent=windl)
-
-            except Exception as e:
-                messagebox.showerror("Error", f"Download failed: {str(e)}", parent=windl)
-            finally:
-                # Re-enable download button
-                download_btn.configure(state="normal", text="Download")
-                #windl.destroy()
+    def show_queue_progress(item, event):
+        if followed[0] != item.name:
+            current = download_queue.queue.find(followed[0]) if followed[0] else None
+            if current is not None and current.state == download_queue.RUNNING:
+                return
+            followed[0] = item.name
+            progress_panel.reset()
+        progress_panel(event)
 
-        threading.Thread(target=do_download, daemon=True).start()
+    def on_queue_event(item, event):
+        if event is not None:
+            ui.post(lambda: show_queue_progress(item, event))
 
     def reload_downloaded_versions():
         versions.clear()
         listbox_manage.delete(0, "end")
         reload_version_folder_button.configure(state="disabled", text="Loading...")
-        data = get_config_data()
-        version_folder = data["settings"]["download_dir"]   
+        version_folder = config.get("download_dir")
         if not os.path.exists(version_folder):
             reload_version_folder_button.configure(state="normal", text="Reload downloaded versions")
             return  
-        downloaded_versions = os.listdir(version_folder)
-        downloaded_versions.sort(reverse=True)
-        for a in downloaded_versions:
-            full_dir = os.path.join(version_folder, a)
-            meta_data_file = os.path.join(full_dir, "metadata.yml") 
-            if os.path.isdir(full_dir) and os.path.exists(meta_data_file):
-                try:
-                    with open(meta_data_file, "r") as f:
-                        data = yaml.safe_load(f)
-                    current_version = data["metadata"]["version"]
-                    versions.append((a, current_version))
-                    listbox_manage.insert("end", f"{a} - {current_version}")
-                except Exception as e:
-                    print(f"Error reading metadata for {a}: {e}")   
+        entries = version_index.index.entries(version_folder)
+        pinned = retention.pinned_versions()
+        for a in sorted(entries, reverse=True):
+            current_version = entries[a]["version"]
+            versions.append((a, current_version))
+            listbox_manage.insert("end", f"{a} - {current_version}" + (" (pinned)" if a in pinned else ""))
         reload_version_folder_button.configure(state="normal", text="Reload downloaded versions")
 
     def get_selected_version():
@@ -232,8 +161,7 @@ def open_release_downloader(owner, repo):
                 messagebox.showerror("Invalid Name", "Invalid folder name. Avoid special characters.")
                 return
 
-            data = get_config_data()
-            version_folder = data["settings"]["download_dir"]
+            version_folder = config.get("download_dir")
             old_path = os.path.join(version_folder, selected_folder)
             new_path = os.path.join(version_folder, new_name.strip())
 
@@ -244,8 +172,14 @@ def open_release_downloader(owner, repo):
 
             try:
                 os.rename(old_path, new_path)
+                version_index.index.rename(version_folder, selected_folder, new_name.strip())
+                # .current, the configured version and the pins must not be left naming the old folder,
+                # or eviction would no longer protect the renamed version
+                active_version.rename(selected_folder, new_name.strip(), version_folder)
+                retention.rename(selected_folder, new_name.strip())
+                # Don't wait for the next poll to drop the old name from the lists
+                version_watcher.rescan()
                 messagebox.showinfo("Success", f"Renamed '{selected_folder}' to '{new_name}'")
-                reload_downloaded_versions()  # Refresh the list
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to rename: {str(e)}")
         selected_version = get_selected_version()
@@ -288,20 +222,101 @@ def open_release_downloader(owner, repo):
         if not response:
             return
 
-        data = get_config_data()
-        version_folder = data["settings"]["download_dir"]
+        version_folder = config.get("download_dir")
         folder_path = os.path.join(version_folder, selected_folder)
 
         try:
             if os.path.exists(folder_path):
                 shutil.rmtree(folder_path)
+                version_index.index.remove(version_folder, selected_folder)
+                version_watcher.rescan()
+                # Objects still linked from other versions survive, the rest is freed
+                freed = object_store.collect_garbage(version_folder)
+                if freed:
+                    print(f"Freed {object_store.format_size(freed)} from the object store")
                 messagebox.showinfo("Success", f"Deleted '{selected_folder}'")
-                reload_downloaded_versions()  # Refresh the list
             else:
                 messagebox.showwarning("Not Found", f"Folder '{selected_folder}' not found.")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to delete: {str(e)}")
 
+    def toggle_pin():
+        """Pinned versions are never evicted by the retention limits"""
+        selected_folder = get_selected_version()
+        if not selected_folder:
+            return
+        retention.set_pinned(selected_folder, selected_folder not in retention.pinned_versions())
+        reload_downloaded_versions()
+
+    def find_release(version_name):
+        """(zip_url, assets) of a release by name, from the fetched list or the release cache"""
+        for release in releases + cached_releases():
+            if release["name"] == version_name:
+                return release["zipball_url"], release["assets"]
+        return None
+
+    def repair_selected_version():
+        """Re-fetch only the broken files of the selected version"""
+        selection = listbox_manage.curselection()
+        if not selection or selection[0] >= len(versions):
+            messagebox.showwarning("No Selection", "Please select a version first.")
+            return
+        folder, version_name = versions[selection[0]]
+        release = find_release(version_name)
+        if release is None:
+            messagebox.showerror("Error", f"Release '{version_name}' not found, fetch the releases first.", parent=windl)
+            return
+        zip_url, assets = release
+        repair_button.configure(state="disabled", text="Repairing...")
+
+        def do_repair():
+            try:
+                result = repair_version(
+                    config.get("download_dir"), folder, zip_url, assets,
+                    max_workers=config.get("download_workers", DEFAULT_MAX_WORKERS),
+                )
+                if not result["repaired"] and not result["missing_from_release"]:
+                    text = f"'{folder}' is fine, nothing to repair."
+                else:
+                    text = f"Repaired {len(result['repaired'])} file(s) of '{folder}'."
+                    if result["missing_from_release"]:
+                        text += "\nNot in the release anymore: " + ", ".join(result["missing_from_release"])
+                ui.post(lambda: messagebox.showinfo("Repair", text, parent=windl))
+            except Exception as e:
+                ui.post(lambda msg=str(e): messagebox.showerror("Error", f"Repair failed: {msg}", parent=windl))
+            ui.post(lambda: repair_button.configure(state="normal", text="Repair"))
+
+        threading.Thread(target=do_repair, daemon=True).start()
+
+    def verify_installed_versions():
+        """Re-hash all installed versions against their recorded manifests"""
+        verify_button.configure(state="disabled", text="Verifying...")
+
+        def do_verify():
+            try:
+                reports = verify.verify_versions(config.get("download_dir"))
+                text = verify.format_report(reports)
+                ui.post(lambda: messagebox.showinfo("Verify", text, parent=windl))
+            except Exception as e:
+                ui.post(lambda msg=str(e): messagebox.showerror("Error", f"Verify failed: {msg}", parent=windl))
+            ui.post(lambda: verify_button.configure(state="normal", text="Verify"))
+
+        threading.Thread(target=do_verify, daemon=True).start()
+
+    def show_storage_report():
+        """Show how much space the installed versions take and how much deduplication saved"""
+        report = object_store.storage_report(config.get("download_dir"))
+        fmt = object_store.format_size
+        messagebox.showinfo(
+            "Storage",
+            f"Installed versions: {report['versions']}\n"
+            f"Stored objects: {report['objects']}\n\n"
+            f"Size as independent copies: {fmt(report['logical_bytes'])}\n"
+            f"Size on disk: {fmt(report['physical_bytes'])}\n"
+            f"Saved: {fmt(report['saved_bytes'])}",
+            parent=windl
+        )
+
     # --- Create popup window ---
     windl = ctk.CTkToplevel()
     windl.title(f"Version Manager")
@@ -315,6 +330,9 @@ def open_release_downloader(owner, repo):
     y = (windl.winfo_screenheight() // 2) - (550 // 2)
     windl.geometry(f"600x850+{x}+{y}")
 
+    ui = TkDispatcher(windl)
+    fetch_cancel = threading.Event()
+
     # Title label
     title_label = ctk.CTkLabel(windl, text=f"Releases for {owner}/{repo}", 
                               font=ctk.CTkFont(size=16, weight="bold"))
@@ -344,6 +362,42 @@ def open_release_downloader(owner, repo):
     )
     delete_button.pack(side="left", padx=5)
     
+    # Repair button
+    repair_button = ctk.CTkButton(
+        button_frame, 
+        text="Repair", 
+        command=repair_selected_version,
+        width=10
+    )
+    repair_button.pack(side="left", padx=5)
+    
+    # Verify button
+    verify_button = ctk.CTkButton(
+        button_frame,
+        text="Verify",
+        command=verify_installed_versions,
+        width=10
+    )
+    verify_button.pack(side="left", padx=5)
+    
+    # Pin button
+    pin_button = ctk.CTkButton(
+        button_frame,
+        text="Pin",
+        command=toggle_pin,
+        width=10
+    )
+    pin_button.pack(side="left", padx=5)
+    
+    # Storage report button
+    storage_button = ctk.CTkButton(
+        button_frame,
+        text="Storage",
+        command=show_storage_report,
+        width=10
+    )
+    storage_button.pack(side="left", padx=5)
+    
     # Keep your existing reload button
     reload_version_folder_button = ctk.CTkButton(
         button_frame,
@@ -389,6 +443,7 @@ def open_release_downloader(owner, repo):
         listbox_frame, 
         width=70, 
         height=15,
+        selectmode="extended",  # several releases can be queued at once
         bg="#212121",  # Dark background to match CTk theme
         fg="white",    # White text
         selectbackground="#1f538d",  # Blue selection
@@ -404,42 +459,180 @@ def open_release_downloader(owner, repo):
     scrollbar.config(command=listbox.yview)
 
     # Download button
-    download_btn = ctk.CTkButton(windl, text="Download", 
-                                command=lambda: download_all(get_config_data()["settings"]["download_dir"]), width=250, height=40)
-    download_btn.pack(pady=(10, 20))
-
-    reload_downloaded_versions()
+    download_frame = ctk.CTkFrame(windl, fg_color="transparent")
+    download_frame.pack(pady=(10, 5))
+    download_btn = ctk.CTkButton(download_frame, text="Download", 
+                                command=lambda: download_all(config.get("download_dir")), width=250, height=40)
+    download_btn.pack(side="left", padx=5)
+    queue_btn = ctk.CTkButton(download_frame, text="Queue", command=open_download_queue_window, width=100, height=40)
+    queue_btn.pack(side="left", padx=5)
+
+    progress_panel = ProgressPanel(windl, fg_color="transparent")
+    progress_panel.pack(fill="x", padx=20, pady=(0, 20))
+
+    # The watcher refreshes the list now and whenever the versions folder changes
+    def on_versions_changed(events, names):
+        if windl.winfo_exists():
+            version_index.index.apply_events(config.get("download_dir"), events)
+            reload_downloaded_versions()
+
+    def on_windl_destroy(event):
+        if event.widget is windl:
+            version_watcher.unsubscribe(on_versions_changed)
+            download_queue.queue.unsubscribe(on_queue_event)
+            fetch_cancel.set()
+            ui.close()
+
+    version_watcher.subscribe(on_versions_changed)
+    download_queue.queue.subscribe(on_queue_event)
+    windl.bind("<Destroy>", on_windl_destroy, add="+")
     fetch_releases()
 
     return windl
 
 
+download_queue_started = False
+
+
+def get_download_queue():
+    """The download queue, started on first use; finished installs refresh the version lists"""
+    global download_queue_started
+    import download_queue
+
+    def on_queue_event(item, event):
+        if event is None and item.state == download_queue.DONE:
+            if version_watcher is not None:
+                version_watcher.notify_changed(item.name)
+            import retention
+            # The new version must survive until the user had a chance to select it
+            retention.evict_in_background(keep=[item.name])
+
+    if not download_queue_started:
+        download_queue_started = True
+        download_queue.queue.subscribe(on_queue_event)
+        download_queue.queue.start()
+    return download_queue.queue
+
+
+def open_download_queue_window():
+    """Queued, running and finished downloads with pause/resume/cancel and the speed settings"""
+    import download_queue
+
+    queue = get_download_queue()
+    win = ctk.CTkToplevel()
+    win.title("Download Queue")
+    win.geometry("700x380")
+    win.transient(root)
+
+    list_frame = ctk.CTkFrame(win)
+    list_frame.pack(pady=10, padx=10, fill="both", expand=True)
+    queue_list = tk.Listbox(
+        list_frame,
+        height=10,
+        bg="#212121",
+        fg="white",
+        selectbackground="#1f538d",
+        selectforeground="white",
+        relief="flat",
+        borderwidth=0,
+        font=("Consolas", 10),
+    )
+    queue_list.pack(fill="both", expand=True)
+    shown = []
+
+    def refresh():
+        if not win.winfo_exists():
+            return
+        selected = queue_list.curselection()
+        selected_name = shown[selected[0]].name if selected and selected[0] < len(shown) else None
+        shown[:] = queue.items()
+        queue_list.delete(0, "end")
+        for i, item in enumerate(shown):
+            queue_list.insert("end", download_queue.format_item(item))
+            if item.name == selected_name:
+                queue_list.selection_set(i)
+        if not shown:
+            queue_list.insert("end", "Nothing queued, select releases in the Version Manager")
+        win.after(500, refresh)
+
+    def selected_item():
+        selected = queue_list.curselection()
+        if not selected or selected[0] >= len(shown):
+            return None
+        return shown[selected[0]]
+
+    def on_selected(action):
+        item = selected_item()
+        if item is not None:
+            action(item)
+
+    button_frame = ctk.CTkFrame(win, fg_color="transparent")
+    button_frame.pack(pady=(0, 5))
+    buttons = (
+        ("Pause", lambda item: queue.pause(item.name)),
+        ("Resume", lambda item: queue.resume(item.name)),
+        ("Cancel", lambda item: queue.cancel(item.name)),
+        ("Priority +", lambda item: queue.set_priority(item.name, item.priority + 1)),
+        ("Priority -", lambda item: queue.set_priority(item.name, item.priority - 1)),
+    )
+    for text, action in buttons:
+        button = ctk.CTkButton(button_frame, text=text, width=90, command=lambda action=action: on_selected(action))
+        button.pack(side="left", padx=3)
+    clear_button = ctk.CTkButton(button_frame, text="Clear finished", width=110, command=queue.clear_finished)
+    clear_button.pack(side="left", padx=3)
+
+    settings_frame = ctk.CTkFrame(win, fg_color="transparent")
+    settings_frame.pack(pady=(5, 10))
+    concurrency_var = ctk.StringVar(value=str(config.get("download_concurrency", download_queue.DEFAULT_CONCURRENCY)))
+    bandwidth_var = ctk.StringVar(value=str(config.get("bandwidth_limit_kb", 0)))
+    ctk.CTkLabel(settings_frame, text="Parallel releases").pack(side="left", padx=(0, 5))
+    ctk.CTkEntry(settings_frame, width=50, textvariable=concurrency_var).pack(side="left")
+    ctk.CTkLabel(settings_frame, text="Limit KB/s (0 = none)").pack(side="left", padx=(15, 5))
+    ctk.CTkEntry(settings_frame, width=80, textvariable=bandwidth_var).pack(side="left")
+
+    def apply_settings():
+        try:
+            concurrency = int(concurrency_var.get())
+            bandwidth_kb = int(bandwidth_var.get())
+            if concurrency < 1 or bandwidth_kb < 0:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Error", "Parallel releases must be at least 1 and the limit 0 or more.", parent=win)
+            return
+        queue.set_limits(concurrency, bandwidth_kb)
+
+    apply_button = ctk.CTkButton(settings_frame, text="Apply", width=70, command=apply_settings)
+    apply_button.pack(side="left", padx=10)
+    refresh()
+
+
+def set_prefetching(enabled):
+    """Start or stop the background download of new releases"""
+    global prefetcher
+    if prefetcher is not None:
+        prefetcher.stop()
+        prefetcher = None
+    if enabled:
+        import prefetch
+
+        prefetcher = prefetch.Prefetcher(get_download_queue())
+        prefetcher.start()
+
+
+def version_label(version, ready):
+    return f"{version}{READY_SUFFIX}" if version in ready else version
+
+
+def label_version(label):
+    return label[:-len(READY_SUFFIX)] if label.endswith(READY_SUFFIX) else label
+
+
 def optionmenu_callback(choice):
+    import active_version
+
     try:
-        config_path = os.path.join(get_appdata_dir(), "first-go-game-launcher")#os.getenv("appdata")
-        config_file = os.path.join(config_path, "config.yml")
-        
-        # Read existing config or create new structure
-        if os.path.exists(config_file):
-            with open(config_file, "r", encoding="utf-8") as f:
-                data = yaml.safe_load(f) or {}
-        else:
-            data = {}
-        
-        # Ensure settings section exists
-        if "settings" not in data:
-            data["settings"] = {}
-        
-        data["settings"]["version"] = choice
-        
-        # Save back to file
-        with open(config_file, "w", encoding="utf-8") as f:
-            yaml.dump(data, f, allow_unicode=True)
-        
-        # Optional: Show success message or close window
+        active_version.select(label_version(choice))
         print("Configuration saved successfully!")  # Replace with proper notification
-        # win.destroy()  # Uncomment to close window after saving
-        
     except Exception as e:
         print(f"Error saving config: {e}")  # Replace with proper error handling
 
@@ -483,47 +676,59 @@ def config_configuration_screen():
 
     def save_config():
         try:
-            config_path = os.path.join(get_appdata_dir(), "first-go-game-launcher")#os.getenv("appdata")
-            config_file = os.path.join(config_path, "config.yml")
-            
-            # Read existing config or create new structure
-            if os.path.exists(config_file):
-                with open(config_file, "r", encoding="utf-8") as f:
-                    data = yaml.safe_load(f) or {}
-            else:
-                data = {}
-            
-            # Ensure settings section exists
-            if "settings" not in data:
-                data["settings"] = {}
-            
-            # Update the download_dir with current entry value
-            data["settings"]["download_dir"] = version_dir_text.get()
-            
             # Create directory if it doesn't exist
             new_dir = version_dir_text.get()
             if new_dir and not os.path.exists(new_dir):
                 os.makedirs(new_dir, exist_ok=True)
-            
-            # Save back to file
-            with open(config_file, "w", encoding="utf-8") as f:
-                yaml.dump(data, f, allow_unicode=True)
-            
-            # Optional: Show success message or close window
+
+            config.set("download_dir", new_dir)
+            version_watcher.set_path(new_dir)
             print("Configuration saved successfully!")  # Replace with proper notification
-            # win.destroy()  # Uncomment to close window after saving
-            
         except Exception as e:
             print(f"Error saving config: {e}")  # Replace with proper error handling
 
+        try:
+            max_versions = int(max_versions_text.get() or 0)
+            max_bytes = int(float(max_gb_text.get() or 0) * 1024 ** 3)
+            if max_versions < 0 or max_bytes < 0:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Error", "The version and GB limits must be 0 or more.", parent=win)
+            return
+        config.update({"retention_max_versions": max_versions, "retention_max_bytes": max_bytes})
+        import retention
+        retention.evict_in_background()
+
+    prefetch_var = ctk.BooleanVar(value=config.get("prefetch_releases", False))
+    prefetch_checkbox = ctk.CTkCheckBox(win, text="Download new releases in the background", variable=prefetch_var)
+    prefetch_checkbox.grid(row=2, column=0, columnspan=2, sticky="w", padx=10, pady=10)
+
+    def save_prefetch():
+        enabled = prefetch_var.get()
+        if enabled != config.get("prefetch_releases", False):
+            config.set("prefetch_releases", enabled)
+            set_prefetching(enabled)
+
+    prefetch_checkbox.configure(command=save_prefetch)
+
+    # Retention: old versions are evicted least recently used first once a limit is exceeded
+    retention_frame = ctk.CTkFrame(win, fg_color="transparent")
+    retention_frame.grid(row=3, column=0, columnspan=2, sticky="w", padx=10, pady=10)
+    max_versions_text = ctk.StringVar(value=str(config.get("retention_max_versions") or 0))
+    max_gb_text = ctk.StringVar(value=f"{(config.get('retention_max_bytes') or 0) / 1024 ** 3:g}")
+    ctk.CTkLabel(retention_frame, text="Keep at most").pack(side="left")
+    ctk.CTkEntry(retention_frame, width=50, textvariable=max_versions_text).pack(side="left", padx=5)
+    ctk.CTkLabel(retention_frame, text="versions and").pack(side="left")
+    ctk.CTkEntry(retention_frame, width=60, textvariable=max_gb_text).pack(side="left", padx=5)
+    ctk.CTkLabel(retention_frame, text="GB (0 = no limit)").pack(side="left")
+
     save_button = ctk.CTkButton(win, text="Save", command=save_config)
     save_button.grid(row=1, column=0, sticky="")
 
     def load_config():
         
-        data = get_config_data()
         # Now just set the StringVar value
-        version_dir_text.set(data["settings"]["download_dir"])
+        version_dir_text.set(config.get("download_dir"))
     
     load_config()
 
@@ -534,66 +739,254 @@ def startgame(mode="host", arg="8080"):
     arg: port number for host mode, or join link for join mode
     """
     global root
-    data = get_config_data()
+    import game
+
+    download_dir = config.get("download_dir")
+    version = config.get("version")
 
     system = platform.system()
 
-    if system == "Windows":
-        game_exe = os.path.join(data["settings"]["download_dir"], data["settings"]["version"], "source", "main.exe")
-    elif system == "Darwin":
+    if system == "Darwin":
         messagebox.showerror("Error", "Diggi ich hab kein macos compile die scheiße selber: 'go build .'")
-    else:
-        anwser = messagebox.askquestion("Linux", "Did you 'chmod -R 755 " + data["settings"]["download_dir"] + "'?")
-        if anwser == "yes":
-            game_exe = os.path.join(data["settings"]["download_dir"], data["settings"]["version"], "source", "main")
-        else:
+        return
+    elif system != "Windows":
+        anwser = messagebox.askquestion("Linux", "Did you 'chmod -R 755 " + download_dir + "'?")
+        if anwser != "yes":
             messagebox.showerror("Error", "You need to do this!")
             return
 
-    #game_exe = os.path.join(data["settings"]["download_dir"], data["settings"]["version"], "source", "main.exe")
-    game_dir = os.path.join(data["settings"]["download_dir"], data["settings"]["version"], "source")
+    game_exe = game.game_executable(download_dir, version)
+    game_dir = game.game_dir(download_dir, version)
     
     if not os.path.exists(game_exe):
         print(f"Game executable not found at: {game_exe}")
         messagebox.showerror("Error", f"Game executable not found at: {game_exe}.\nYou probably downloaded a version without a precompiled main.exe. You either download another version or compile it yourself by simply downloading golang and typing \n'go build main.go'\n in a console window in the source folder", parent=root)
         return
     
-    # Method 1: Using subprocess (recommended)
-    def run_game():
+    from supervisor import supervisor
+
+    # The supervisor keeps the process handle, watches it from its own thread and stops it when we exit
+    try:
+        supervisor.start(version, game_exe, mode, arg, game_dir)
+    except OSError as e:
+        print(f"Error running game: {e}")
+        messagebox.showerror("Error", f"Could not start the game: {e}", parent=root)
+        return
+
+    import prefetch
+    import retention
+
+    retention.record_launch(version)
+    # A prefetched version is no longer new once it was played
+    if prefetch.clear_ready(version) and version_watcher is not None:
+        version_watcher.notify_changed(version)
+
+
+def open_process_monitor():
+    """Window listing the running game instances with their CPU and memory use"""
+    import supervisor
+
+    win = ctk.CTkToplevel()
+    win.title("Game Processes")
+    win.geometry("600x300")
+    win.transient(root)
+
+    list_frame = ctk.CTkFrame(win)
+    list_frame.pack(pady=10, padx=10, fill="both", expand=True)
+    process_list = tk.Listbox(
+        list_frame,
+        height=10,
+        bg="#212121",
+        fg="white",
+        selectbackground="#1f538d",
+        selectforeground="white",
+        relief="flat",
+        borderwidth=0,
+        font=("Consolas", 10),
+    )
+    process_list.pack(fill="both", expand=True)
+    shown = []
+
+    def refresh():
+        if not win.winfo_exists():
+            return
+        selected = process_list.curselection()
+        selected_pid = shown[selected[0]]["pid"] if selected and selected[0] < len(shown) else None
+        shown[:] = supervisor.supervisor.status()
+        process_list.delete(0, "end")
+        for i, status in enumerate(shown):
+            process_list.insert("end", supervisor.format_status_line(status))
+            if status["pid"] == selected_pid:
+                process_list.selection_set(i)
+        if not shown:
+            process_list.insert("end", "No game started from this launcher")
+        win.after(1000, refresh)
+
+    def stop_selected():
+        selected = process_list.curselection()
+        if not selected or selected[0] >= len(shown):
+            return
+        pid = shown[selected[0]]["pid"]
+        for proc in supervisor.supervisor.processes(running_only=True):
+            if proc.pid == pid:
+                # Waiting for the game to exit must not freeze the window
+                threading.Thread(target=supervisor.supervisor.stop, args=(proc,), daemon=True).start()
+
+    def show_selected_log():
+        selected = process_list.curselection()
+        if not selected or selected[0] >= len(shown):
+            return
+        pid = shown[selected[0]]["pid"]
+        for proc in supervisor.supervisor.processes():
+            if proc.pid == pid and proc.log is not None:
+                open_log_window(proc)
+
+    button_frame = ctk.CTkFrame(win, fg_color="transparent")
+    button_frame.pack(pady=(0, 10))
+    stop_button = ctk.CTkButton(button_frame, text="Stop", command=stop_selected)
+    stop_button.pack(side="left", padx=5)
+    log_button = ctk.CTkButton(button_frame, text="Show log", command=show_selected_log)
+    log_button.pack(side="left", padx=5)
+    refresh()
+
+
+LOG_VIEW_LINES = 2000
+LOG_LINES_PER_TICK = 500
+LOG_POLL_MS = 200
+
+
+def open_log_window(proc):
+    """Live tail of a game's output, read from its ring buffer so a chatty server can't block the UI"""
+    win = ctk.CTkToplevel()
+    win.title(f"Log - {proc.version} {proc.mode} ({proc.pid})")
+    win.geometry("800x450")
+
+    path_label = ctk.CTkLabel(win, text=proc.log.path, font=ctk.CTkFont(size=10), text_color="gray")
+    path_label.pack(padx=10, pady=(5, 0), anchor="w")
+    textbox = ctk.CTkTextbox(win, wrap="none", font=("Consolas", 11))
+    textbox.pack(fill="both", expand=True, padx=10, pady=10)
+    textbox.tag_config("err", foreground="#ff6b6b")
+    textbox.tag_config("skipped", foreground="gray")
+    last_seq = 0
+
+    def poll():
+        nonlocal last_seq
+        if not win.winfo_exists():
+            return
+        lines, newest = proc.log.lines_since(last_seq, limit=LOG_LINES_PER_TICK)
+        if lines:
+            follow = textbox.yview()[1] >= 1.0
+            skipped = newest - last_seq - len(lines)
+            if skipped:
+                textbox.insert("end", f"... {skipped} lines skipped, see the log file\n", "skipped")
+            for _, tag, line in lines:
+                textbox.insert("end", line + "\n", tag if tag == "err" else ())
+            textbox.delete("1.0", f"end-{LOG_VIEW_LINES} lines")
+            if follow:
+                textbox.see("end")
+        last_seq = newest
+        if proc.running or lines:
+            win.after(LOG_POLL_MS, poll)
+        else:
+            textbox.insert("end", f"--- exited with code {proc.exit_code} ---\n", "skipped")
+
+    poll()
+
+def open_swarm_window():
+    """Load test: start one host and N join clients of the selected version"""
+    import swarm
+
+    version = config.get("version")
+    if not version:
+        messagebox.showerror("Error", "Select a version first!", parent=root)
+        return
+
+    win = ctk.CTkToplevel()
+    win.title(f"Swarm test - {version}")
+    win.geometry("500x400")
+    win.transient(root)
+    win.grid_columnconfigure(1, weight=1)
+    win.grid_rowconfigure(4, weight=1)
+
+    fields = {}
+    for row, (key, label, default) in enumerate((
+        ("clients", "Clients", "10"),
+        ("rate", "Clients per second", str(swarm.DEFAULT_RATE)),
+        ("duration", "Run for (seconds)", str(swarm.DEFAULT_DURATION)),
+    )):
+        ctk.CTkLabel(win, text=label).grid(row=row, column=0, sticky="w", padx=10, pady=5)
+        var = ctk.StringVar(win, value=default)
+        ctk.CTkEntry(win, textvariable=var).grid(row=row, column=1, sticky="ew", padx=10, pady=5)
+        fields[key] = var
+
+    output = ctk.CTkTextbox(win)
+    output.grid(row=4, column=0, columnspan=2, sticky="nsew", padx=10, pady=10)
+    ui = TkDispatcher(win)
+    cancel = threading.Event()
+
+    def log(msg):
+        def append():
+            output.insert("end", msg + "\n")
+            output.see("end")
+        ui.post(append)
+
+    def run(clients, rate, duration):
         try:
-            # Build command with arguments
-            if mode == "host":
-                cmd = [game_exe, "host", str(arg)]
-            elif mode == "join":
-                cmd = [game_exe, "join", str(arg)]
-            else:
-                print(f"Invalid mode: {mode}")
-                return
-            print(f"Running command: {' '.join(cmd)}")
-            subprocess.run(cmd, cwd=game_dir, check=True)
-        except subprocess.CalledProcessError as e:
-            print(f"Game exited with error code: {e.returncode}")
+            report = swarm.run_swarm(config.get("download_dir"), version, clients, rate=rate,
+                                     duration=duration, cancel_event=cancel, log=log)
+            report_path = os.path.join(get_launcher_dir(), "swarm_report.json")
+            swarm.save_report(report, report_path)
+            log(swarm.format_report(report) + f"\nReport saved to {report_path}")
         except Exception as e:
-            print(f"Error running game: {e}")
-    
-    game_thread = threading.Thread(target=run_game)
-    game_thread.daemon = True  # Thread will close when main program closes
-    game_thread.start()
+            log(f"Swarm failed: {e}")
+        ui.post(lambda: start_button.configure(text="Start", state="normal"))
+
+    def start_or_stop():
+        if start_button.cget("text") == "Stop":
+            cancel.set()
+            start_button.configure(state="disabled")
+            return
+        try:
+            clients = int(fields["clients"].get())
+            rate = float(fields["rate"].get())
+            duration = float(fields["duration"].get())
+        except ValueError:
+            messagebox.showerror("Error", "Clients, rate and duration must be numbers", parent=win)
+            return
+        if clients < 0 or rate <= 0 or duration < 0:
+            messagebox.showerror("Error", "Clients, rate and duration must be positive", parent=win)
+            return
+        cancel.clear()
+        start_button.configure(text="Stop")
+        threading.Thread(target=run, args=(clients, rate, duration), daemon=True).start()
+
+    start_button = ctk.CTkButton(win, text="Start", command=start_or_stop)
+    start_button.grid(row=3, column=0, columnspan=2, pady=5)
+
+    def on_destroy(event):
+        if event.widget is win:
+            cancel.set()
+            ui.close()
+
+    win.bind("<Destroy>", on_destroy, add="+")
+
 
 def startgame_window():
     global startmode
+    import game
 
-    data = get_config_data()
-    if data["settings"]["version"] == "":
+    current_version = config.get("version")
+    if current_version == "":
         return
     
-    download_dir_path = get_config_data()["settings"]["download_dir"]
-    current_version = get_config_data()["settings"]["version"]
-    full_path = os.path.join(download_dir_path, current_version, "source", "version.yml")
-
-    if not os.path.exists(full_path):
+    try:
+        version_data = {"version-data": game.load_version_data(config.get("download_dir"), current_version)}
+    except FileNotFoundError:
         messagebox.showerror("Error", "version.yml file not found!")
         return
+    except (OSError, game.VersionDataError) as e:
+        messagebox.showerror("Error", f"Invalid version.yml: {e}")
+        return
 
     win = ctk.CTkToplevel()
     win.title("Start Screen")
@@ -614,10 +1007,6 @@ def startgame_window():
 
     """Create a customizable start menu based on version.yml configuration"""
 
-
-    with open(full_path, "r") as f:
-        version_data = yaml.safe_load(f)
-
     # Get default mode from config
     startmode = version_data["version-data"]["standart-mode"]
     
@@ -739,74 +1128,77 @@ def startgame_window():
 
     win.mainloop()
 
-def reload_available_versions():
+def reload_available_versions(events, values):
+    """Sync the version optionmenu with the versions folder, called by the watcher on the Tk thread"""
     global optionmenu
     global optionmenu_var
-    global stop_threads
     #global windl
+    import active_version
+    import prefetch
+
     def save_config(value):
         try:
-            config_path = os.path.join(get_appdata_dir(), "first-go-game-launcher")#os.getenv("appdata")
-            config_file = os.path.join(config_path, "config.yml")
-            
-            # Read existing config or create new structure
-            if os.path.exists(config_file):
-                with open(config_file, "r", encoding="utf-8") as f:
-                    data = yaml.safe_load(f) or {}
-            else:
-                data = {}
-            
-            # Ensure settings section exists
-            if "settings" not in data:
-                data["settings"] = {}
-
-            data["settings"]["version"] = value#values[0]
-            
-            # Save back to file
-            with open(config_file, "w", encoding="utf-8") as f:
-                yaml.dump(data, f, allow_unicode=True)
-            
-            # Optional: Show success message or close window
+            active_version.select(value)
             print("Configuration saved successfully!")  # Replace with proper notification
-            #windl.destroy()  # Uncomment to close window after saving
-            
         except Exception as e:
             print(f"Error saving config: {e}")  # Replace with proper error handling
-    while not stop_threads:
-        values = os.listdir(get_config_data()["settings"]["download_dir"])
-        if get_config_data()["settings"]["version"] in values:
-            optionmenu_var.set(value=get_config_data()["settings"]["version"])
-        if get_config_data()["settings"]["version"] not in values and values != []:
-            optionmenu_var.set(value=values[-1])
-            save_config(values[-1])
-        if get_config_data()["settings"]["version"] not in values and values == []:
-            optionmenu_var.set(value="")
-            values.append("")
-            if get_config_data()["settings"]["version"] != "":
-                save_config("")
-        #if optionmenu_var.get() not in values and get_config_data()["settings"]["version"] not in values:
-        #    print("current selected and saved version not available")
-        #    optionmenu_var.set(value=values[0])
-        #if optionmenu_var.get() == "" and get_config_data()["settings"]["version"] in values:
-        #    #optionmenu_var.set(values[0])
-        #    optionmenu_var.set(get_config_data()["settings"]["version"])
-        #    print("reloading save_config")
-        #    save_config(get_config_data()["settings"]["version"])
-        if not optionmenu._values == values:
-            optionmenu.configure(values=values)
-        time.sleep(1)
-    print("thread-1 stopped (reload thread)")
+    # Only complete versions: metadata.yml is written last, so folders without it are no installs
+    download_dir = config.get("download_dir")
+    values = [value for value in values if os.path.exists(os.path.join(download_dir, value, "metadata.yml"))]
+    ready = prefetch.ready_versions()
+    labels = [version_label(value, ready) for value in values]
+    current_version = config.get("version")
+    if current_version in values:
+        optionmenu_var.set(value=version_label(current_version, ready))
+    if current_version not in values and values != []:
+        optionmenu_var.set(value=labels[-1])
+        save_config(values[-1])
+    if current_version not in values and values == []:
+        optionmenu_var.set(value="")
+        labels.append("")
+        if current_version != "":
+            save_config("")
+    if not optionmenu._values == labels:
+        optionmenu.configure(values=labels)
+
+def verify_active_version(ui):
+    """Check the selected version in the background and warn if files are broken"""
+    version = config.get("version")
+    if not version:
+        return
+
+    def do_verify():
+        import verify
+
+        try:
+            reports = verify.verify_versions(config.get("download_dir"), names=[version])
+        except Exception as e:
+            print(f"Verify on launch failed: {e}")
+            return
+        broken = verify.broken_versions(reports)
+        if broken:
+            text = verify.format_report(broken)
+            ui.post(lambda: messagebox.showwarning("Broken install", f"{text}\n\nDownload the version again to fix it.", parent=root))
+
+    threading.Thread(target=do_verify, daemon=True).start()
 
 def main():
     global optionmenu
     global optionmenu_var
     global root
+    global version_watcher
 
     def on_closing():
-        global stop_threads
-        stop_threads = True
-        reload_thread.join()
+        if version_watcher is not None:
+            version_watcher.stop()
+        if prefetcher is not None:
+            prefetcher.stop()
+        if "supervisor" in sys.modules:
+            sys.modules["supervisor"].supervisor.shutdown()
+        if "transport" in sys.modules:
+            sys.modules["transport"].print_connection_stats()
         root.quit()
+
     # --- Main window ---
     ctk.set_appearance_mode("dark")
     ctk.set_default_color_theme("blue")
@@ -816,7 +1208,6 @@ def main():
     root.geometry("400x250")
 
     # Center the main window
-    root.update_idletasks()
     x = (root.winfo_screenwidth() // 2) - (400 // 2)
     y = (root.winfo_screenheight() // 2) - (250 // 2)
     root.geometry(f"400x250+{x}+{y}")
@@ -831,6 +1222,9 @@ def main():
     file_menu = tk.Menu(menubar, tearoff=0)
     file_menu.add_command(label="Config", command=config_configuration_screen)
     file_menu.add_command(label="Versions", command=lambda: open_release_downloader(OWNER, REPO))
+    file_menu.add_command(label="Downloads", command=open_download_queue_window)
+    file_menu.add_command(label="Processes", command=open_process_monitor)
+    file_menu.add_command(label="Swarm test", command=open_swarm_window)
     #file_menu.add_command(label="Port Forward")
     file_menu.add_separator()
     file_menu.add_command(label="Exit", command=on_closing) #root.quit
@@ -840,31 +1234,10 @@ def main():
 
     def reset_config():
         try:
-            config_path = os.path.join(get_appdata_dir(), "first-go-game-launcher")#os.getenv("appdata")
-            config_file = os.path.join(config_path, "config.yml")
-            
-            # Read existing config or create new structure
-            if os.path.exists(config_file):
-                with open(config_file, "r", encoding="utf-8") as f:
-                    data = yaml.safe_load(f) or {}
-            else:
-                data = {}
-            
-            # Ensure settings section exists
-            if "settings" not in data:
-                data["settings"] = {}
-            
-            # Update the download_dir with current entry value
-            data["settings"]["download_dir"] = os.path.join(get_appdata_dir(), "first-go-game-launcher", "versions")#os.getenv("appdata")
-            
-            # Save back to file
-            with open(config_file, "w", encoding="utf-8") as f:
-                yaml.dump(data, f, allow_unicode=True)
-            
-            # Optional: Show success message or close window
+            config.set("download_dir", default_versions_dir())
+            if version_watcher is not None:
+                version_watcher.set_path(default_versions_dir())
             print("Configuration saved successfully!")  # Replace with proper notification
-            # win.destroy()  # Uncomment to close window after saving
-            
         except Exception as e:
             print(f"Error saving config: {e}")  # Replace with proper error handling
 
@@ -873,18 +1246,9 @@ def main():
     #repo_info = ctk.CTkLabel(root, text=f"Repository: {OWNER}/{REPO}", 
     #                        font=ctk.CTkFont(size=12), text_color="gray")
     #repo_info.pack(pady=(0, 30))
-    try:
-        version_values = os.listdir(get_config_data()["settings"]["download_dir"])
-    except FileNotFoundError:
-        version_values = os.path.join(get_appdata_dir(), "first-go-game-launcher", "versions")#os.getenv("appdata")
-        os.makedirs(version_values, exist_ok=True)
-        reset_config()
-        messagebox.showerror("Error", f"Version folder got reseted to {version_values} because the custom folder could not be found!", parent=root)
-    if version_values == []:
-        version_values.append("")
-
     optionmenu_var = ctk.StringVar(value="")
-    optionmenu = ctk.CTkOptionMenu(root, values=version_values,
+    # Filled in by the version watcher once the window is up
+    optionmenu = ctk.CTkOptionMenu(root, values=[""],
                                          command=optionmenu_callback,
                                          variable=optionmenu_var)
     optionmenu.pack()
@@ -904,8 +1268,46 @@ def main():
     start_game_button = ctk.CTkButton(root, text="Start game", command=startgame_window)
     start_game_button.pack()
 
-    reload_thread = threading.Thread(target=reload_available_versions)
-    reload_thread.start()
+    def finish_startup():
+        """Everything the first frame doesn't need, run once the window is shown"""
+        global version_watcher
+        if not os.path.isdir(config.get("download_dir")):
+            versions_path = default_versions_dir()
+            os.makedirs(versions_path, exist_ok=True)
+            reset_config()
+            messagebox.showerror("Error", f"Version folder got reseted to {versions_path} because the custom folder could not be found!", parent=root)
+
+        import active_version
+        active_version.sync()
+
+        version_watcher = VersionWatcher(config.get("download_dir"), dispatch=TkDispatcher(root))
+        version_watcher.subscribe(reload_available_versions)
+        version_watcher.start()
+
+        if config.get("verify_on_launch", True):
+            verify_active_version(TkDispatcher(root))
+
+        # Downloads that were queued or running when the launcher was closed continue now
+        import download_queue
+        if download_queue.queue.pending():
+            get_download_queue()
+
+        if config.get("prefetch_releases", False):
+            set_prefetching(True)
+
+        import retention
+        retention.evict_in_background()
+
+        if os.environ.get(STARTUP_PROBE_ENV):
+            report_startup_time()
+
+    def report_startup_time():
+        # Used by bench_startup.py: print the time since the harness spawned us and exit
+        started = float(os.environ[STARTUP_PROBE_ENV])
+        print(f"time_to_first_window_ms={(time.time() - started) * 1000:.1f}", flush=True)
+        on_closing()
+
+    root.after_idle(finish_startup)
 
     root.protocol("WM_DELETE_WINDOW", on_closing)
 
@@ -0,0 +1,133 @@
+import hashlib
+import os
+import stat
+import uuid
+
+STORE_DIR_NAME = ".objects"
+HASH_BUFFER_SIZE = 1024 * 1024
+
+
+def store_dir_for(download_dir):
+    # Inside download_dir so the objects are on the same filesystem as the versions (hardlinks)
+    return os.path.join(download_dir, STORE_DIR_NAME)
+
+
+def hash_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(HASH_BUFFER_SIZE)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _object_path(store_dir, digest, executable):
+    # Hardlinks share their mode, so executables get their own object
+    name = digest + (".x" if executable else "")
+    return os.path.join(store_dir, digest[:2], name)
+
+
+def _iter_files(root):
+    for dirpath, dirnames, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            if not os.path.islink(path):
+                yield path
+
+
+def dedupe_tree(download_dir, tree, digests=None):
+    """
+    Move every file of tree into the content-addressed store and replace it with a hardlink.
+    Files that are already in the store (from another version) share the stored copy.
+    digests can map path -> sha256 when the hashes are already known.
+    Returns the number of bytes saved.
+    """
+    store_dir = store_dir_for(download_dir)
+    saved = 0
+    for path in _iter_files(tree):
+        st = os.lstat(path)
+        if st.st_nlink > 1:
+            continue  # already linked into the store
+        digest = (digests or {}).get(path) or hash_file(path)
+        obj = _object_path(store_dir, digest, bool(st.st_mode & stat.S_IXUSR))
+        os.makedirs(os.path.dirname(obj), exist_ok=True)
+        try:
+            os.link(path, obj)
+            continue  # first copy, the file itself becomes the object
+        except FileExistsError:
+            pass
+        except OSError as e:
+            print(f"Can't hardlink into the object store, skipping deduplication: {e}")
+            return saved
+        # Swap the file for a link to the existing object
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        os.link(obj, tmp)
+        os.replace(tmp, path)
+        saved += st.st_size
+    return saved
+
+
+def collect_garbage(download_dir):
+    """Delete objects no version links to anymore (link count 1). Returns the bytes freed."""
+    store_dir = store_dir_for(download_dir)
+    freed = 0
+    if not os.path.isdir(store_dir):
+        return freed
+    for path in _iter_files(store_dir):
+        st = os.lstat(path)
+        if st.st_nlink <= 1:
+            os.remove(path)
+            freed += st.st_size
+    for name in os.listdir(store_dir):
+        try:
+            os.rmdir(os.path.join(store_dir, name))
+        except OSError:
+            pass
+    return freed
+
+
+def storage_report(download_dir):
+    """
+    Sizes of all installed versions: logical is what they would take as independent copies,
+    physical what they really take on disk, saved the difference.
+    """
+    logical = 0
+    seen = set()
+    physical = 0
+    versions = 0
+    for name in os.listdir(download_dir) if os.path.isdir(download_dir) else []:
+        version_dir = os.path.join(download_dir, name)
+        if name.startswith(".") or not os.path.isdir(version_dir):
+            continue
+        versions += 1
+        for path in _iter_files(version_dir):
+            st = os.lstat(path)
+            logical += st.st_size
+            if (st.st_dev, st.st_ino) not in seen:
+                seen.add((st.st_dev, st.st_ino))
+                physical += st.st_size
+    objects = 0
+    store_dir = store_dir_for(download_dir)
+    if os.path.isdir(store_dir):
+        for path in _iter_files(store_dir):
+            objects += 1
+            st = os.lstat(path)
+            if (st.st_dev, st.st_ino) not in seen:
+                seen.add((st.st_dev, st.st_ino))
+                physical += st.st_size  # orphaned object, freed by collect_garbage
+    return {
+        "versions": versions,
+        "objects": objects,
+        "logical_bytes": logical,
+        "physical_bytes": physical,
+        "saved_bytes": logical - physical,
+    }
+
+
+def format_size(num):
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(num) < 1024 or unit == "GB":
+            return f"{num:.1f} {unit}" if unit != "B" else f"{num} B"
+        num /= 1024
@@ -0,0 +1,98 @@
+import os
+import threading
+
+from config_store import config
+from download_queue import FINISHED_STATES
+
+DEFAULT_INTERVAL_MINUTES = 60
+# Versions that were installed in the background and not launched yet
+READY_KEY = "prefetched_versions"
+# Tag of the newest release the prefetcher has already handled, so a deleted version isn't fetched again
+LAST_TAG_KEY = "prefetch_last_tag"
+
+
+def ready_versions():
+    return set(config.get(READY_KEY, []))
+
+
+def mark_ready(release):
+    """A background install of release finished: show it as new and don't fetch this tag again"""
+    ready = config.get(READY_KEY, [])
+    settings = {LAST_TAG_KEY: release["tag_name"]}
+    if release["name"] not in ready:
+        settings[READY_KEY] = ready + [release["name"]]
+    config.update(settings)
+
+
+def clear_ready(name):
+    """The version was launched, it is not new anymore. Returns True if it was marked"""
+    ready = config.get(READY_KEY, [])
+    if name not in ready:
+        return False
+    config.set(READY_KEY, [n for n in ready if n != name])
+    return True
+
+
+def latest_release(releases):
+    """Newest published release, drafts and pre-releases are left to the user"""
+    return next((r for r in releases if not r.get("draft") and not r.get("prerelease")), None)
+
+
+def check(queue):
+    """
+    One prefetch pass: revalidate the release list (a 304 while nothing changed) and queue the
+    newest release as a background download if it is new and not installed yet.
+    Returns the queued release or None. The tag is only recorded as handled once the download
+    succeeded (or the version already is installed), so a failed prefetch is tried again.
+    """
+    from releases import revalidate_releases
+
+    release = latest_release(revalidate_releases()[0])
+    if release is None or release["tag_name"] == config.get(LAST_TAG_KEY):
+        return None
+    if os.path.isdir(os.path.join(config.get("download_dir"), release["name"])):
+        config.set(LAST_TAG_KEY, release["tag_name"])
+        return None
+    queued = queue.find(release["name"])
+    if queued is not None and queued.state not in FINISHED_STATES:
+        return None
+    queue.add(release, background=True)
+    return release
+
+
+class Prefetcher:
+    """
+    Opt-in background updater (prefetch_releases setting): checks for a new release right away
+    and then every prefetch_interval_minutes, and lets the download queue install it at low
+    priority. A finished prefetch is marked ready until the version is launched for the first time.
+    """
+
+    def __init__(self, queue, interval=None):
+        self.queue = queue
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self):
+        from releases import RateLimited
+
+        # Not niced: queue.add() may start queue workers from this thread and they would inherit it,
+        # the queue lowers the priority of the background download itself
+        while not self._stop_event.is_set():
+            try:
+                release = check(self.queue)
+                if release is not None:
+                    print(f"Prefetching new release {release['name']}")
+            except RateLimited as e:
+                print(f"Prefetch skipped: {e}")
+            except Exception as e:
+                print(f"Prefetch check failed: {e}")
+            interval = self.interval or config.get("prefetch_interval_minutes", DEFAULT_INTERVAL_MINUTES) * 60
+            self._stop_event.wait(interval)
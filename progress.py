@@ -0,0 +1,181 @@
+import sys
+import threading
+import time
+
+from object_store import format_size
+
+PHASES = ("download", "extract", "move", "metadata", "verify", "done")
+EMIT_INTERVAL = 0.1
+# Weight of the newest throughput sample in the smoothed rate
+RATE_SMOOTHING = 0.3
+
+
+class ProgressEvent:
+    """
+    Progress of one file (name) or, with name None, of the whole release in the current phase.
+    rate is the smoothed throughput in bytes/s, eta the estimated seconds left (None if unknown).
+    """
+
+    __slots__ = ("release", "phase", "name", "done", "total", "rate", "eta", "time")
+
+    def __init__(self, release, phase, name, done, total, rate, eta):
+        self.release = release
+        self.phase = phase
+        self.name = name
+        self.done = done
+        self.total = total
+        self.rate = rate
+        self.eta = eta
+        self.time = time.monotonic()
+
+    @property
+    def fraction(self):
+        return min(1.0, self.done / self.total) if self.total else None
+
+    def __repr__(self):
+        return (f"ProgressEvent({self.release!r}, {self.phase!r}, {self.name!r}, "
+                f"{self.done}/{self.total}, rate={self.rate:.0f})")
+
+
+class _Meter:
+    """Smoothed throughput and ETA of a byte counter"""
+
+    def __init__(self):
+        self.rate = 0.0
+        self._last = None
+        self.last_emit = 0.0
+
+    def update(self, done, total):
+        now = time.monotonic()
+        if self._last is None:
+            self._last = (now, done)
+        else:
+            last_time, last_done = self._last
+            if now - last_time >= EMIT_INTERVAL:
+                sample = max(0, done - last_done) / (now - last_time)
+                self.rate = sample if not self.rate else RATE_SMOOTHING * sample + (1 - RATE_SMOOTHING) * self.rate
+                self._last = (now, done)
+        eta = (total - done) / self.rate if total and self.rate > 0 else None
+        return self.rate, eta
+
+
+class ProgressTracker:
+    """
+    Collects the progress of one install and hands ProgressEvents to its listeners.
+    It is the progress callback of the downloader (called with a DownloadJob after every chunk)
+    and the installer moves it through the phases with set_phase/advance. Events are throttled
+    to one per file and one for the release every EMIT_INTERVAL seconds, plus one whenever a
+    file or phase completes. Listeners are called on the worker threads.
+    """
+
+    def __init__(self, release, listeners=()):
+        self.release = release
+        self.phase = "download"
+        self._listeners = list(listeners)
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._meters = {}
+        self._phase_done = 0
+        self._phase_total = None
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def _emit(self, event):
+        for listener in self._listeners:
+            listener(event)
+
+    def _event(self, name, done, total, force):
+        """Event for name (None: whole release) if it's due, caller holds the lock"""
+        meter = self._meters.setdefault(name, _Meter())
+        rate, eta = meter.update(done, total)
+        now = time.monotonic()
+        if not force and now - meter.last_emit < EMIT_INTERVAL:
+            return None
+        meter.last_emit = now
+        return ProgressEvent(self.release, self.phase, name, done, total, rate, eta)
+
+    def __call__(self, job):
+        with self._lock:
+            self._jobs[job.name] = job
+            finished = job.size is not None and job.done >= job.size
+            events = [self._event(job.name, job.done, job.size, finished)]
+            sizes = [j.size for j in self._jobs.values()]
+            total = sum(sizes) if None not in sizes else None
+            done = sum(j.done for j in self._jobs.values())
+            events.append(self._event(None, done, total, finished))
+        for event in events:
+            if event is not None:
+                self._emit(event)
+
+    def set_phase(self, phase, total=None):
+        """Start the next phase, total is its amount of work in bytes if known"""
+        with self._lock:
+            self.phase = phase
+            self._phase_done = 0
+            self._phase_total = total
+            self._meters.pop(None, None)
+            event = self._event(None, 0, total, True)
+        self._emit(event)
+
+    def advance(self, amount):
+        """Report amount bytes of progress in the current (non-download) phase"""
+        with self._lock:
+            self._phase_done += amount
+            finished = self._phase_total is not None and self._phase_done >= self._phase_total
+            event = self._event(None, self._phase_done, self._phase_total, finished)
+        if event is not None:
+            self._emit(event)
+
+    def finish(self):
+        self.set_phase("done")
+
+
+def set_phase(progress, phase, total=None):
+    """Installer helper, progress may also be a plain job callback that knows nothing about phases"""
+    if isinstance(progress, ProgressTracker):
+        progress.set_phase(phase, total)
+
+
+def advance(progress, amount):
+    if isinstance(progress, ProgressTracker):
+        progress.advance(amount)
+
+
+def format_event(event):
+    """One line description, e.g. "download main: 45% 12.0 MB/26.5 MB, 3.2 MB/s, 5s left" """
+    label = f"{event.phase} {event.name}" if event.name else f"{event.phase} {event.release}"
+    if event.phase == "done":
+        return f"{event.release}: done"
+    if event.total:
+        text = f"{label}: {event.fraction * 100:.0f}% {format_size(event.done)}/{format_size(event.total)}"
+    elif event.done:
+        text = f"{label}: {format_size(event.done)}"
+    else:
+        text = label
+    if event.rate:
+        text += f", {format_size(int(event.rate))}/s"
+    if event.eta is not None:
+        text += f", {event.eta:.0f}s left"
+    return text
+
+
+class PrintSink:
+    """Listener that prints the release-wide progress at most every interval seconds, for the CLI and logs"""
+
+    def __init__(self, interval=1.0, file=None):
+        self.interval = interval
+        self.file = file or sys.stderr
+        self._last = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        if event.name is not None:
+            return
+        with self._lock:
+            last = self._last.get(event.phase)
+            complete = event.phase == "done" or (event.total and event.done >= event.total)
+            if last is not None and not complete and event.time - last < self.interval:
+                return
+            self._last[event.phase] = event.time
+        print(format_event(event), file=self.file, flush=True)
@@ -0,0 +1,119 @@
+import threading
+import time
+
+import customtkinter as ctk
+
+from progress import format_event
+from tk_dispatch import TkDispatcher
+
+REFRESH_MS = 100
+MAX_FILE_ROWS = 5
+# No new bytes for this long and a transfer counts as stalled, not just slow
+STALL_SECONDS = 5.0
+
+
+class ProgressPanel(ctk.CTkFrame):
+    """
+    Progress bars for a ProgressTracker: one for the whole release and one per file that is
+    still downloading (the newest MAX_FILE_ROWS). It is a tracker listener that may be called
+    from any thread; events only update a dict and the widgets are redrawn from it on the Tk
+    thread at most every REFRESH_MS.
+    """
+
+    def __init__(self, master, **kwargs):
+        super().__init__(master, **kwargs)
+        self._ui = TkDispatcher(self)
+        self._lock = threading.Lock()
+        self._release_event = None
+        self._file_events = {}
+        self._scheduled = False
+        self._tick = None
+        self._rows = {}
+
+        self.label = ctk.CTkLabel(self, text="", anchor="w")
+        self.label.pack(fill="x", padx=10, pady=(5, 0))
+        self.bar = ctk.CTkProgressBar(self)
+        self.bar.set(0)
+        self.bar.pack(fill="x", padx=10, pady=(0, 5))
+        self.files_frame = ctk.CTkFrame(self, fg_color="transparent")
+        self.files_frame.pack(fill="x", padx=10)
+
+    def __call__(self, event):
+        with self._lock:
+            if event.name is None:
+                if self._release_event is None or event.time >= self._release_event.time:
+                    self._release_event = event
+            else:
+                last = self._file_events.get(event.name)
+                if last is None or event.time >= last.time:
+                    self._file_events[event.name] = event
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._ui.post(lambda: self.after(REFRESH_MS, self._refresh))
+
+    def reset(self):
+        with self._lock:
+            self._release_event = None
+            self._file_events.clear()
+        for label, bar in self._rows.values():
+            label.destroy()
+            bar.destroy()
+        self._rows.clear()
+        self.label.configure(text="")
+        self.bar.set(0)
+
+    def _refresh(self):
+        if not self.winfo_exists():
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._scheduled = False
+            release_event = self._release_event
+            downloading = release_event is None or release_event.phase == "download"
+            active = [e for e in self._file_events.values() if downloading and (not e.total or e.done < e.total)]
+            active.sort(key=lambda e: e.time, reverse=True)
+            active = active[:MAX_FILE_ROWS]
+
+        if release_event is not None:
+            text = format_event(release_event)
+            if release_event.phase == "download" and active and all(now - e.time > STALL_SECONDS for e in active):
+                text += f" - stalled, no data for {now - max(e.time for e in active):.0f}s"
+            self.label.configure(text=text)
+            fraction = release_event.fraction
+            if fraction is None:
+                self.bar.set(1 if release_event.phase == "done" else 0)
+            else:
+                self.bar.set(fraction)
+
+        shown = {e.name for e in active}
+        for name in list(self._rows):
+            if name not in shown:
+                label, bar = self._rows.pop(name)
+                label.destroy()
+                bar.destroy()
+        for event in active:
+            if event.name not in self._rows:
+                label = ctk.CTkLabel(self.files_frame, text="", anchor="w", font=ctk.CTkFont(size=11))
+                label.pack(fill="x")
+                bar = ctk.CTkProgressBar(self.files_frame, height=6)
+                bar.pack(fill="x", pady=(0, 4))
+                self._rows[event.name] = (label, bar)
+            label, bar = self._rows[event.name]
+            text = format_event(event)
+            if now - event.time > STALL_SECONDS:
+                text += " - stalled"
+            label.configure(text=text)
+            bar.set(event.fraction or 0)
+
+        # Keep redrawing while something is in flight, so a stall shows up without new events
+        if release_event is not None and release_event.phase != "done" and self._tick is None:
+            self._tick = self.after(1000, self._on_tick)
+
+    def _on_tick(self):
+        self._tick = None
+        self._refresh()
+
+    def destroy(self):
+        self._ui.close()
+        super().destroy()
@@ -0,0 +1,16 @@
+import json
+import sys
+
+from installer import build_manifest, MANIFEST_ASSET_NAME
+
+# Run in the game's source folder after building, then upload the manifest.json as
+# release asset so launchers can update by downloading only the changed files.
+def main():
+    source_dir = sys.argv[1] if len(sys.argv) > 1 else "."
+    files = build_manifest(source_dir)
+    files.pop(MANIFEST_ASSET_NAME, None)
+    with open(MANIFEST_ASSET_NAME, "w") as f:
+        json.dump({"files": files}, f, indent=1, sort_keys=True)
+
+if __name__ == "__main__":
+    main()
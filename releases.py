@@ -0,0 +1,157 @@
+import json
+import os
+import threading
+import time
+
+import transport
+from config_store import API_URL, atomic_write_json, get_launcher_dir
+
+CACHE_FILE_NAME = "releases_cache.json"
+# Bumped when parse_release keeps new fields, a cache of an older format is fetched again in full
+CACHE_FORMAT = 2
+PER_PAGE = 100
+_cache_lock = threading.Lock()
+
+
+class RateLimited(Exception):
+    """GitHub refused the request because the rate limit is used up, retry_at is a unix timestamp"""
+
+    def __init__(self, retry_at):
+        self.retry_at = retry_at
+        super().__init__(f"GitHub API rate limit reached, try again in {self.wait_minutes()} min")
+
+    def wait_minutes(self):
+        return max(1, int((self.retry_at - time.time() + 59) // 60))
+
+
+def cache_path():
+    return os.path.join(get_launcher_dir(), CACHE_FILE_NAME)
+
+
+def load_cache():
+    """
+    The cached release list as {"format", "etag", "fetched_at", "retry_at", "releases"} or None.
+    "releases" is missing while no fetch has succeeded yet.
+    """
+    with _cache_lock:
+        try:
+            with open(cache_path(), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+
+def save_cache(cache):
+    path = cache_path()
+    with _cache_lock:
+        atomic_write_json(path, cache)
+
+
+def parse_release(release):
+    """Keep only what the launcher needs from a GitHub release object"""
+    return {
+        "name": release["name"] or release["tag_name"],
+        "tag_name": release["tag_name"],
+        "zipball_url": release["zipball_url"],
+        "published_at": release.get("published_at"),
+        # The prefetcher leaves these to the user
+        "draft": release.get("draft", False),
+        "prerelease": release.get("prerelease", False),
+        "assets": [
+            {"name": a["name"], "browser_download_url": a["browser_download_url"], "size": a.get("size")}
+            for a in release.get("assets", [])
+        ],
+    }
+
+
+def cached_releases():
+    """Release list from the cache for instant display, [] if nothing is cached yet"""
+    # A first fetch that hit the rate limit leaves a cache with only retry_at in it
+    return (load_cache() or {}).get("releases", [])
+
+
+def _rate_limit_reset(res):
+    """Unix time when we may ask again, or None if the response isn't a rate limit error"""
+    retry_after = res.headers.get("Retry-After")
+    if retry_after and retry_after.isdigit():
+        return time.time() + int(retry_after)
+    if res.status_code in (403, 429) and res.headers.get("X-RateLimit-Remaining") == "0":
+        reset = res.headers.get("X-RateLimit-Reset")
+        return float(reset) if reset and reset.isdigit() else time.time() + 60
+    return None
+
+
+class FetchCancelled(Exception):
+    pass
+
+
+def _get(url, headers):
+    res = transport.get(url, headers=headers)
+    reset = _rate_limit_reset(res)
+    if reset is not None and res.status_code in (403, 429):
+        raise RateLimited(reset)
+    return res
+
+
+def revalidate_releases(on_page=None, cancel_event=None):
+    """
+    Ask GitHub whether the release list changed since it was cached.
+    The first page is requested with If-None-Match, so an unchanged list comes back as a 304
+    which doesn't count against the rate limit. Otherwise every page is followed through the
+    Link: rel="next" header and handed to on_page(page_releases, first_page) as soon as it
+    arrives. Returns (releases, changed). Raises RateLimited instead of hitting the API while
+    the limit is still used up and FetchCancelled once cancel_event is set.
+    """
+    cache = load_cache() or {}
+    retry_at = cache.get("retry_at") or 0
+    if retry_at > time.time():
+        raise RateLimited(retry_at)
+    try:
+        return _fetch_pages(cache, on_page, cancel_event)
+    except RateLimited as e:
+        cache["retry_at"] = e.retry_at
+        save_cache(cache)
+        raise
+
+
+def _fetch_pages(cache, on_page, cancel_event):
+    headers = {"Accept": "application/vnd.github+json"}
+    if cache.get("etag") and "releases" in cache and cache.get("format") == CACHE_FORMAT:
+        headers["If-None-Match"] = cache["etag"]
+
+    res = _get(f"{API_URL}?per_page={PER_PAGE}", headers)
+
+    if res.status_code == 304:
+        cache["fetched_at"] = time.time()
+        save_cache(cache)
+        return cache.get("releases", []), False
+
+    etag = res.headers.get("ETag")
+    headers.pop("If-None-Match", None)
+    releases = []
+    first_page = True
+    while True:
+        if cancel_event is not None and cancel_event.is_set():
+            raise FetchCancelled()
+        res.raise_for_status()
+        page = [parse_release(r) for r in res.json()]
+        releases.extend(page)
+        if on_page:
+            on_page(page, first_page)
+        first_page = False
+
+        next_url = res.links.get("next", {}).get("url")
+        if not next_url:
+            break
+        if cancel_event is not None and cancel_event.is_set():
+            raise FetchCancelled()
+        res = _get(next_url, headers)
+
+    save_cache({
+        "format": CACHE_FORMAT,
+        "etag": etag,
+        "fetched_at": time.time(),
+        "retry_at": 0,
+        "releases": releases,
+    })
+    return releases, releases != cache.get("releases")
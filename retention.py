@@ -0,0 +1,172 @@
+import os
+import shutil
+import sys
+import threading
+import time
+
+from config_store import config
+
+EVICTED_DIR_NAME = ".evicted"
+# Version folder -> time.time() of its last launch
+LAST_LAUNCHED_KEY = "last_launched"
+PINNED_KEY = "pinned_versions"
+
+_evict_lock = threading.Lock()
+
+
+def record_launch(version):
+    last_launched = dict(config.get(LAST_LAUNCHED_KEY) or {})
+    last_launched[version] = time.time()
+    config.set(LAST_LAUNCHED_KEY, last_launched)
+
+
+def _forget_launch(version):
+    last_launched = dict(config.get(LAST_LAUNCHED_KEY) or {})
+    if last_launched.pop(version, None) is not None:
+        config.set(LAST_LAUNCHED_KEY, last_launched)
+
+
+def pinned_versions():
+    return set(config.get(PINNED_KEY) or [])
+
+
+def set_pinned(version, pinned):
+    names = pinned_versions()
+    if pinned:
+        names.add(version)
+    else:
+        names.discard(version)
+    config.set(PINNED_KEY, sorted(names))
+
+
+def rename(old, new):
+    """The version folder old was renamed to new: carry its pin, launch time and prefetched mark over"""
+    import prefetch
+
+    settings = {}
+    pinned = pinned_versions()
+    if old in pinned:
+        settings[PINNED_KEY] = sorted(pinned - {old} | {new})
+    last_launched = dict(config.get(LAST_LAUNCHED_KEY) or {})
+    if old in last_launched:
+        last_launched[new] = last_launched.pop(old)
+        settings[LAST_LAUNCHED_KEY] = last_launched
+    ready = config.get(prefetch.READY_KEY, [])
+    if old in ready:
+        settings[prefetch.READY_KEY] = [new if name == old else name for name in ready]
+    if settings:
+        config.update(settings)
+
+
+def limits():
+    """(max_bytes, max_versions) of the retention_max_bytes/retention_max_versions settings, 0 means no limit"""
+    return int(config.get("retention_max_bytes") or 0), int(config.get("retention_max_versions") or 0)
+
+
+def protected_versions(download_dir, keep=()):
+    """
+    Versions eviction must never touch: pinned, selected, behind .current, running right now,
+    prefetched and not played yet, and keep (e.g. the version that was just installed)
+    """
+    import active_version
+    import prefetch
+
+    protected = pinned_versions() | prefetch.ready_versions() | set(keep)
+    protected.add(config.get("version"))
+    protected.add(active_version.current_version(download_dir))
+    if "supervisor" in sys.modules:
+        protected.update(p.version for p in sys.modules["supervisor"].supervisor.processes(running_only=True))
+    protected.discard(None)
+    return protected
+
+
+def eviction_order(entries, protected):
+    """Evictable folders, least recently used first. Never launched versions count from their install"""
+    last_launched = config.get(LAST_LAUNCHED_KEY) or {}
+    candidates = [name for name in entries if name not in protected]
+    return sorted(candidates, key=lambda name: last_launched.get(name) or entries[name]["installed_at"])
+
+
+def _remove_version(download_dir, folder):
+    """Hide the folder with one rename (it leaves the version menu at once), then delete it"""
+    evicted_dir = os.path.join(download_dir, EVICTED_DIR_NAME)
+    os.makedirs(evicted_dir, exist_ok=True)
+    target = os.path.join(evicted_dir, f"{folder}-{os.getpid()}")
+    os.rename(os.path.join(download_dir, folder), target)
+    shutil.rmtree(target, ignore_errors=True)
+    try:
+        os.rmdir(evicted_dir)
+    except OSError:
+        pass
+
+
+def evict(download_dir=None, dry_run=False, keep=()):
+    """
+    Delete least recently used versions until download_dir is within the retention limits.
+    Sizes are what the versions really take on disk, so files shared through the object store
+    only count once. Returns [(folder, bytes freed)]; with dry_run nothing is deleted and the
+    freed bytes are the versions' own sizes, an upper bound when files are shared.
+    keep names versions to leave alone besides the protected_versions().
+    """
+    import object_store
+    from version_index import index
+
+    download_dir = download_dir or config.get("download_dir")
+    max_bytes, max_versions = limits()
+    if not max_bytes and not max_versions:
+        return []
+
+    entries = index.entries(download_dir)
+    count = len(entries)
+    used = object_store.storage_report(download_dir)["physical_bytes"] if max_bytes else 0
+    evicted = []
+    for folder in eviction_order(entries, protected_versions(download_dir, keep)):
+        if (not max_versions or count <= max_versions) and (not max_bytes or used <= max_bytes):
+            break
+        freed = entries[folder]["size"]
+        if dry_run:
+            used -= freed
+        else:
+            try:
+                _remove_version(download_dir, folder)
+            except OSError as e:
+                # e.g. a file of it is in use on Windows, try the next one
+                print(f"Could not evict {folder}: {e}")
+                continue
+            index.remove(download_dir, folder)
+            _forget_launch(folder)
+            object_store.collect_garbage(download_dir)
+            if max_bytes:
+                remaining = object_store.storage_report(download_dir)["physical_bytes"]
+                freed, used = max(0, used - remaining), remaining
+        count -= 1
+        evicted.append((folder, freed))
+        print(f"{'Would evict' if dry_run else 'Evicted'} {folder} ({object_store.format_size(freed)})")
+    return evicted
+
+
+def evict_in_background(download_dir=None, on_done=None, keep=()):
+    """
+    Run evict() on a low priority thread unless one is already running.
+    on_done gets the evicted list (on that thread) if anything was removed.
+    """
+    if not any(limits()):
+        return
+
+    def run():
+        from download_queue import lower_thread_priority
+
+        if not _evict_lock.acquire(blocking=False):
+            return
+        try:
+            lower_thread_priority()
+            evicted = evict(download_dir, keep=keep)
+        except Exception as e:
+            print(f"Eviction failed: {e}")
+            return
+        finally:
+            _evict_lock.release()
+        if evicted and on_done is not None:
+            on_done(evicted)
+
+    threading.Thread(target=run, name="evict", daemon=True).start()
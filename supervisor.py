@@ -0,0 +1,245 @@
+import json
+import os
+import signal
+import subprocess
+import threading
+import time
+
+import game
+from game_log import GameLog
+from config_store import atomic_write_json, config, get_launcher_dir
+
+DEFAULT_SAMPLE_INTERVAL = 2.0
+SHUTDOWN_TIMEOUT = 5.0
+STATUS_FILE_NAME = "processes.json"
+# Exited instances kept around so their exit code can still be shown
+MAX_FINISHED = 20
+
+try:
+    CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+    PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    CLOCK_TICKS = PAGE_SIZE = None
+
+
+def read_proc_stats(pid):
+    """(cpu seconds, rss bytes) of a process from /proc, None where /proc isn't available"""
+    if CLOCK_TICKS is None:
+        return None
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            stat = f.read()
+        with open(f"/proc/{pid}/statm", "r") as f:
+            statm = f.read().split()
+    except OSError:
+        return None
+    # The command name in field 2 may contain spaces, the fixed fields start after its ")"
+    fields = stat[stat.rindex(")") + 2:].split()
+    utime, stime = int(fields[11]), int(fields[12])
+    return (utime + stime) / CLOCK_TICKS, int(statm[1]) * PAGE_SIZE
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def format_status_line(status):
+    """One line summary of an entry of ProcessSupervisor.status()"""
+    target = f"port {status['port']}" if status["port"] else status["arg"]
+    line = f"{status['pid']}  {status['version']}  {status['mode']} {target}  up {format_duration(status['uptime'])}"
+    if status["running"]:
+        if status["rss_bytes"] is not None:
+            line += f"  cpu {status['cpu_percent']:.1f}%  rss {status['rss_bytes'] / (1024 * 1024):.1f} MB"
+        return line
+    return line + f"  exited ({status['exit_code']})"
+
+
+class GameProcess:
+    """One launched game instance and its latest resource sample"""
+
+    def __init__(self, popen, version, mode, arg):
+        self.popen = popen
+        self.pid = popen.pid
+        self.version = version
+        self.mode = mode
+        self.arg = str(arg)
+        self.port = int(self.arg) if mode == "host" and self.arg.isdigit() else None
+        self.started_at = time.time()
+        self.ended_at = None
+        self.exit_code = None
+        self.cpu_seconds = None
+        self.cpu_percent = 0.0
+        self.rss_bytes = None
+        self.peak_rss_bytes = None
+        self.log = None
+        self._last_sample = None
+
+    @property
+    def running(self):
+        return self.exit_code is None
+
+    def poll(self):
+        """Update exit_code, returns True while the process is still running"""
+        if self.exit_code is None:
+            code = self.popen.poll()
+            if code is not None:
+                self.exit_code = code
+                self.ended_at = time.time()
+        return self.exit_code is None
+
+    def sample(self):
+        stats = read_proc_stats(self.pid)
+        if stats is None:
+            return
+        cpu_seconds, self.rss_bytes = stats
+        self.peak_rss_bytes = max(self.peak_rss_bytes or 0, self.rss_bytes)
+        now = time.monotonic()
+        if self._last_sample is not None:
+            last_time, last_cpu = self._last_sample
+            if now > last_time:
+                self.cpu_percent = (cpu_seconds - last_cpu) / (now - last_time) * 100
+        self._last_sample = (now, cpu_seconds)
+        self.cpu_seconds = cpu_seconds
+
+    def status(self):
+        return {
+            "pid": self.pid,
+            "version": self.version,
+            "mode": self.mode,
+            "arg": self.arg,
+            "port": self.port,
+            "started_at": self.started_at,
+            "uptime": (self.ended_at or time.time()) - self.started_at,
+            "running": self.running,
+            "exit_code": self.exit_code,
+            "cpu_seconds": self.cpu_seconds,
+            "cpu_percent": self.cpu_percent,
+            "rss_bytes": self.rss_bytes,
+            "peak_rss_bytes": self.peak_rss_bytes,
+            "log_path": self.log.path if self.log else None,
+        }
+
+
+class ProcessSupervisor:
+    """
+    Starts game instances with Popen and keeps track of them until they exit.
+    While anything runs, a background thread samples CPU time and RSS from /proc every
+    process_sample_interval seconds and writes the status of all instances to a JSON file
+    in the launcher's appdata folder.
+    status() is a thread-safe snapshot for the UI, shutdown() stops all instances gracefully.
+    """
+
+    def __init__(self, interval=None, status_path=None):
+        self.interval = interval
+        self.status_path = status_path or os.path.join(get_launcher_dir(), STATUS_FILE_NAME)
+        self._lock = threading.Lock()
+        self._processes = []
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self, version, game_exe, mode, arg, cwd, capture=True, echo=False):
+        """
+        Launch a game instance, raises OSError if it can't be started.
+        With capture its output goes to a GameLog (and is also printed with echo),
+        else it inherits the launcher's stdout and stderr.
+        """
+        cmd = game.build_command(game_exe, mode, arg)
+        print(f"Running command: {' '.join(cmd)}")
+        pipe = subprocess.PIPE if capture else None
+        proc = GameProcess(subprocess.Popen(cmd, cwd=cwd, stdout=pipe, stderr=pipe), version, mode, arg)
+        if capture:
+            proc.log = GameLog(version, mode, proc.pid, echo=echo)
+            proc.log.attach(proc.popen)
+        proc.sample()
+        with self._lock:
+            self._processes.append(proc)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="process-supervisor", daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return proc
+
+    def processes(self, running_only=False):
+        with self._lock:
+            return [p for p in self._processes if p.running or not running_only]
+
+    def status(self):
+        """List of status dicts of the running and recently exited instances"""
+        with self._lock:
+            return [p.status() for p in self._processes]
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval or config.get("process_sample_interval", DEFAULT_SAMPLE_INTERVAL))
+            self._wake.clear()
+            with self._lock:
+                for p in self._processes:
+                    was_running = p.running
+                    if p.poll():
+                        p.sample()
+                    elif was_running and p.exit_code != 0:
+                        print(f"Game {p.pid} ({p.version}) exited with error code: {p.exit_code}")
+                finished = [p for p in self._processes if not p.running]
+                for p in finished[:-MAX_FINISHED]:
+                    self._processes.remove(p)
+                running = any(p.running for p in self._processes)
+                if not running:
+                    self._thread = None
+            self.dump_status()
+            if not running:
+                return
+
+    def dump_status(self, path=None):
+        """Write the status of all instances to path (default: processes.json) atomically"""
+        path = path or self.status_path
+        data = {"updated_at": time.time(), "launcher_pid": os.getpid(), "processes": self.status()}
+        atomic_write_json(path, data, indent=2)
+
+    def stop(self, proc, timeout=SHUTDOWN_TIMEOUT):
+        """Ask one instance to exit (SIGTERM), kill it if it is still alive after timeout"""
+        self.stop_many([proc], timeout)
+
+    def shutdown(self, timeout=SHUTDOWN_TIMEOUT):
+        """Stop every running instance, used when the launcher exits"""
+        running = self.processes(running_only=True)
+        if running:
+            print(f"Stopping {len(running)} running game instance(s)")
+            self.stop_many(running, timeout)
+            self.dump_status()
+
+    def stop_many(self, procs, timeout=SHUTDOWN_TIMEOUT):
+        """Signal all procs at once and give them timeout seconds in total to exit"""
+        for p in procs:
+            if p.popen.poll() is None:
+                try:
+                    if os.name == "nt":
+                        p.popen.terminate()
+                    else:
+                        p.popen.send_signal(signal.SIGTERM)
+                except OSError:
+                    pass
+        deadline = time.monotonic() + timeout
+        for p in procs:
+            try:
+                p.popen.wait(max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                print(f"Game {p.pid} didn't exit after {timeout:.0f}s, killing it")
+                p.popen.kill()
+                p.popen.wait()
+        with self._lock:
+            for p in procs:
+                p.poll()
+        self._wake.set()
+
+
+def read_status_file(path=None):
+    """The last status written by a launcher, None if there is none"""
+    try:
+        with open(path or os.path.join(get_launcher_dir(), STATUS_FILE_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+supervisor = ProcessSupervisor()
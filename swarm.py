@@ -0,0 +1,241 @@
+"""
+Swarm launch: one host instance and N join clients of a version on this machine, to load test
+the game server. The host gets a free port, the clients are started at a fixed rate against it
+and the start latency, resource use and exit status of every instance end up in a report.
+"""
+import json
+import os
+import socket
+import statistics
+import time
+
+import game
+from supervisor import supervisor as default_supervisor
+
+DEFAULT_RATE = 2.0
+DEFAULT_DURATION = 30.0
+READY_TIMEOUT = 15.0
+POLL_SECONDS = 0.05
+LOCAL_HOST = "127.0.0.1"
+# Used when the join entry of version.yml doesn't have a {port} placeholder to fill in
+DEFAULT_JOIN_URL = "http://{host}:{port}"
+# TCP state code of an established connection in /proc/net/tcp
+TCP_ESTABLISHED = "01"
+
+
+class SwarmError(Exception):
+    pass
+
+
+def free_port(host=LOCAL_HOST):
+    """A TCP port nothing listens on right now"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+
+def port_open(port, host=LOCAL_HOST):
+    try:
+        socket.create_connection((host, port), timeout=0.2).close()
+        return True
+    except OSError:
+        return False
+
+
+def _socket_inodes(pid):
+    inodes = set()
+    fd_dir = f"/proc/{pid}/fd"
+    for fd in os.listdir(fd_dir):
+        try:
+            target = os.readlink(os.path.join(fd_dir, fd))
+        except OSError:
+            continue
+        if target.startswith("socket:["):
+            inodes.add(target[len("socket:["):-1])
+    return inodes
+
+
+def _connections_to(port):
+    """Inodes of the established TCP sockets with port as their remote port, None without /proc"""
+    inodes = set()
+    found_table = False
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            with open(table, "r") as f:
+                lines = f.read().splitlines()[1:]
+        except OSError:
+            continue
+        found_table = True
+        for line in lines:
+            fields = line.split()
+            if fields[3] == TCP_ESTABLISHED and int(fields[2].rsplit(":", 1)[1], 16) == port:
+                inodes.add(fields[9])
+    return inodes if found_table else None
+
+
+def join_url_template(version_data):
+    """The join entry's standard value of version.yml if it has a {port} placeholder"""
+    standard = game.default_arg(version_data, "join")
+    return standard if "{port}" in standard else DEFAULT_JOIN_URL
+
+
+def check_modes(version_data):
+    """The swarm needs both modes, raises SwarmError if version.yml doesn't offer them"""
+    for config_data in version_data["start-args"].values():
+        if config_data["type"] == "optionmenu":
+            missing = [m for m in ("host", "join") if m not in config_data["args"]]
+            if missing:
+                raise SwarmError(f"version.yml has no {' or '.join(missing)} mode")
+
+
+class _Instance:
+    def __init__(self, role, proc, spawn_started):
+        self.role = role
+        self.proc = proc
+        self.spawned_at = time.monotonic()
+        self.spawn_ms = (self.spawned_at - spawn_started) * 1000
+        self.ready_ms = None
+        self.exited_early = False
+
+    def mark_ready(self):
+        self.ready_ms = (time.monotonic() - self.spawned_at) * 1000
+
+    def report(self):
+        return {
+            "role": self.role,
+            "pid": self.proc.pid,
+            "arg": self.proc.arg,
+            "spawn_ms": round(self.spawn_ms, 2),
+            "ready_ms": None if self.ready_ms is None else round(self.ready_ms, 2),
+            "exit_code": self.proc.exit_code,
+            "exited_early": self.exited_early,
+            "cpu_seconds": self.proc.cpu_seconds,
+            "peak_rss_bytes": self.proc.peak_rss_bytes,
+        }
+
+
+def run_swarm(download_dir, version, clients, rate=DEFAULT_RATE, duration=DEFAULT_DURATION,
+              join_url=None, ready_timeout=READY_TIMEOUT, cancel_event=None, log=print, supervisor=None):
+    """
+    Start a host on a free port, wait until it accepts connections, then start the given number
+    of join clients, rate per second, and keep everything running for duration seconds after the last
+    one started (or until cancel_event is set). All instances are stopped at the end.
+    A client counts as ready once it has a TCP connection to the host (Linux only).
+    Returns the report dict.
+    """
+    supervisor = supervisor or default_supervisor
+    version_data = game.load_version_data(download_dir, version)
+    check_modes(version_data)
+    game_exe = game.game_executable(download_dir, version)
+    if not os.path.exists(game_exe):
+        raise SwarmError(f"Game executable not found at: {game_exe}")
+    cwd = game.game_dir(download_dir, version)
+
+    port = free_port()
+    join_arg = (join_url or join_url_template(version_data)).format(host=LOCAL_HOST, port=port)
+    instances = []
+    pending = []
+    started_at = time.time()
+
+    def spawn(role, mode, arg):
+        spawn_started = time.monotonic()
+        inst = _Instance(role, supervisor.start(version, game_exe, mode, arg, cwd), spawn_started)
+        instances.append(inst)
+        return inst
+
+    def cancelled():
+        return cancel_event is not None and cancel_event.is_set()
+
+    def check_instances():
+        for inst in instances:
+            if not inst.exited_early and inst.proc.popen.poll() is not None:
+                inst.exited_early = True
+                log(f"{inst.role} {inst.proc.pid} exited early with code {inst.proc.popen.returncode}")
+        if not pending:
+            return
+        connections = _connections_to(port)
+        for inst in list(pending):
+            if inst.exited_early:
+                pending.remove(inst)
+                continue
+            try:
+                connected = connections is not None and _socket_inodes(inst.proc.pid) & connections
+            except OSError:
+                connected = False
+            if connected:
+                inst.mark_ready()
+                pending.remove(inst)
+            elif connections is None or time.monotonic() - inst.spawned_at > ready_timeout:
+                pending.remove(inst)
+
+    def wait(seconds):
+        end = time.monotonic() + seconds
+        while time.monotonic() < end and not cancelled():
+            check_instances()
+            time.sleep(min(POLL_SECONDS, max(0.0, end - time.monotonic())))
+
+    try:
+        host = spawn("host", "host", port)
+        log(f"Host {host.proc.pid} starting on port {port}")
+        deadline = time.monotonic() + ready_timeout
+        while not port_open(port):
+            if cancelled():
+                raise SwarmError("Cancelled while waiting for the host")
+            if host.proc.popen.poll() is not None:
+                raise SwarmError(f"Host exited with code {host.proc.popen.returncode} before listening")
+            if time.monotonic() > deadline:
+                raise SwarmError(f"Host didn't listen on port {port} within {ready_timeout:.0f}s")
+            time.sleep(POLL_SECONDS)
+        host.mark_ready()
+        log(f"Host ready after {host.ready_ms:.0f} ms, starting {clients} clients against {join_arg}")
+
+        for i in range(clients):
+            if cancelled():
+                break
+            if i:
+                wait(1 / rate)
+            pending.append(spawn("client", "join", join_arg))
+        wait(duration)
+    finally:
+        check_instances()
+        supervisor.stop_many([inst.proc for inst in instances])
+
+    client_ready = [inst.ready_ms for inst in instances if inst.role == "client" and inst.ready_ms is not None]
+    return {
+        "version": version,
+        "started_at": started_at,
+        "host_port": port,
+        "join_url": join_arg,
+        "clients": clients,
+        "rate": rate,
+        "duration": duration,
+        "cancelled": cancelled(),
+        "instances": [inst.report() for inst in instances],
+        "summary": {
+            "clients_started": sum(inst.role == "client" for inst in instances),
+            "clients_ready": len(client_ready),
+            "exited_early": sum(inst.exited_early for inst in instances),
+            "client_ready_ms": {
+                "median": round(statistics.median(client_ready), 2) if client_ready else None,
+                "max": round(max(client_ready), 2) if client_ready else None,
+            },
+        },
+    }
+
+
+def format_report(report):
+    summary = report["summary"]
+    ready = summary["client_ready_ms"]
+    lines = [
+        f"Swarm of {report['version']}: host on port {report['host_port']}, "
+        f"{summary['clients_started']}/{report['clients']} clients started",
+        f"Clients connected: {summary['clients_ready']}, exited early: {summary['exited_early']}",
+    ]
+    if ready["median"] is not None:
+        lines.append(f"Client connect time: median {ready['median']:.0f} ms, max {ready['max']:.0f} ms")
+    return "\n".join(lines)
+
+
+def save_report(report, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
@@ -0,0 +1,49 @@
+import queue
+import threading
+
+
+class TkDispatcher:
+    """
+    Main-thread dispatch queue for a Tk widget.
+    Worker threads post() callables, they are queued and run in one batch on the Tk thread,
+    so widgets are never touched from a worker. Nothing runs anymore once close() was called.
+    """
+
+    def __init__(self, widget):
+        self.widget = widget
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self._closed = False
+
+    def post(self, fn):
+        if self._closed:
+            return
+        self._queue.put(fn)
+        with self._lock:
+            if self._scheduled:
+                return
+            self._scheduled = True
+        try:
+            self.widget.after(0, self._drain)
+        except Exception:
+            # Widget or main loop is already gone
+            self._closed = True
+
+    __call__ = post
+
+    def close(self):
+        self._closed = True
+
+    def _drain(self):
+        with self._lock:
+            self._scheduled = False
+        while not self._closed:
+            try:
+                fn = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                fn()
+            except Exception as e:
+                print(f"Error in UI callback: {e}")
@@ -0,0 +1,106 @@
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config_store import APP_NAME
+
+USER_AGENT = f"{APP_NAME} (+https://github.com/JonasB2510/first-go-game-launcher) python-requests/{requests.__version__}"
+# (connect, read) seconds, read is the time between two bytes, not for the whole body
+DEFAULT_TIMEOUT = (10, 30)
+POOL_CONNECTIONS = 8   # number of hosts to keep pools for
+POOL_MAXSIZE = 16      # keep-alive connections per host, more than the download workers
+
+_session = None
+_session_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_request_counts = {}
+
+
+class LauncherAdapter(HTTPAdapter):
+    """HTTPAdapter that puts a timeout on every request that doesn't bring its own"""
+
+    def send(self, request, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = DEFAULT_TIMEOUT
+        return super().send(request, timeout=timeout, **kwargs)
+
+
+def _host_key(scheme, host, port):
+    if port is None or (scheme, port) in (("https", 443), ("http", 80)):
+        return host
+    return f"{host}:{port}"
+
+
+def _count_response(res, *args, **kwargs):
+    parts = urlsplit(res.url)
+    host = _host_key(parts.scheme, parts.hostname, parts.port)
+    with _stats_lock:
+        _request_counts[host] = _request_counts.get(host, 0) + 1
+
+
+def _build_session():
+    retry = Retry(
+        total=5,
+        connect=5,
+        read=3,
+        status=3,
+        backoff_factor=0.5,  # 0.5s, 1s, 2s, 4s ...
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=("GET", "HEAD"),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = LauncherAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    session.hooks["response"].append(_count_response)
+    return session
+
+
+def get_session():
+    """The launcher wide requests.Session, every network call should go through it"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _build_session()
+        return _session
+
+
+def get(url, **kwargs):
+    return get_session().get(url, **kwargs)
+
+
+def connection_stats():
+    """Per host {"requests", "connections", "reuse_rate"} for the connections opened so far"""
+    if _session is None:
+        return {}
+    connections = {}
+    for adapter in set(_session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = _host_key(pool.scheme, pool.host, pool.port)
+            connections[host] = connections.get(host, 0) + pool.num_connections
+    stats = {}
+    with _stats_lock:
+        counts = dict(_request_counts)
+    for host, count in counts.items():
+        opened = connections.get(host, 0)
+        stats[host] = {
+            "requests": count,
+            "connections": opened,
+            "reuse_rate": round(1 - opened / count, 3) if count and opened <= count else 0.0,
+        }
+    return stats
+
+
+def print_connection_stats():
+    for host, s in sorted(connection_stats().items()):
+        print(f"{host}: {s['requests']} requests over {s['connections']} connections (reuse {s['reuse_rate']:.0%})")
@@ -0,0 +1,91 @@
+import hashlib
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import yaml_io
+
+
+def hash_file_mmap(path):
+    """sha256 of a file through a memory map, hashlib drops the GIL so this scales over threads"""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return hashlib.sha256().hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return hashlib.sha256(mm).hexdigest()
+
+
+def read_recorded_manifest(version_dir):
+    """The files manifest from metadata.yml, None for versions installed before it was recorded"""
+    try:
+        return (yaml_io.load_file(os.path.join(version_dir, "metadata.yml")) or {}).get("metadata", {}).get("files")
+    except (OSError, yaml_io.YAMLError):
+        return None
+
+
+def _check_file(source_dir, rel, entry, quick):
+    """None if the file is fine, else "missing" or "corrupted" """
+    path = os.path.join(source_dir, *rel.split("/"))
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return "missing"
+    if st.st_size != entry["size"]:
+        return "corrupted"
+    if quick:
+        return None
+    return None if hash_file_mmap(path) == entry["sha256"] else "corrupted"
+
+
+def verify_versions(download_dir, names=None, workers=None, quick=False):
+    """
+    Re-hash the files of installed versions against the manifest in their metadata.yml.
+    All files of all versions are spread over one thread pool. quick only compares sizes.
+    Returns {folder: {"ok", "missing", "corrupted", "no_manifest"}}.
+    """
+    if names is None:
+        names = [n for n in sorted(os.listdir(download_dir)) if not n.startswith(".")] \
+            if os.path.isdir(download_dir) else []
+    reports = {}
+    tasks = []
+    for name in names:
+        version_dir = os.path.join(download_dir, name)
+        if not os.path.exists(os.path.join(version_dir, "metadata.yml")):
+            continue
+        report = {"ok": 0, "missing": [], "corrupted": [], "no_manifest": False}
+        reports[name] = report
+        files = read_recorded_manifest(version_dir)
+        if not files:
+            report["no_manifest"] = True
+            continue
+        source_dir = os.path.join(version_dir, "source")
+        tasks.extend((name, source_dir, rel, entry) for rel, entry in files.items())
+
+    workers = workers or min(32, (os.cpu_count() or 1) * 2)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="verify") as pool:
+        results = pool.map(lambda t: _check_file(t[1], t[2], t[3], quick), tasks)
+        for (name, _, rel, _), problem in zip(tasks, results):
+            if problem is None:
+                reports[name]["ok"] += 1
+            else:
+                reports[name][problem].append(rel)
+    return reports
+
+
+def broken_versions(reports):
+    return {name: r for name, r in reports.items() if r["missing"] or r["corrupted"]}
+
+
+def format_report(reports):
+    lines = []
+    for name, r in sorted(reports.items()):
+        if r["no_manifest"]:
+            lines.append(f"{name}: no manifest recorded, can't verify")
+        elif r["missing"] or r["corrupted"]:
+            lines.append(f"{name}: {len(r['corrupted'])} corrupted, {len(r['missing'])} missing")
+            lines.extend(f"  corrupted: {rel}" for rel in r["corrupted"][:10])
+            lines.extend(f"  missing: {rel}" for rel in r["missing"][:10])
+        else:
+            lines.append(f"{name}: OK ({r['ok']} files)")
+    return "\n".join(lines) or "No installed versions."
@@ -0,0 +1,151 @@
+import json
+import os
+import threading
+
+import game
+import yaml_io
+from config_store import atomic_write_json, get_launcher_dir
+
+INDEX_FILE_NAME = "versions_index.json"
+
+
+def _dir_stamp(download_dir):
+    try:
+        return os.stat(download_dir).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _tree_size(path):
+    total = 0
+    for dirpath, dirnames, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def read_version_entry(download_dir, folder):
+    """Index entry for one installed version from its metadata.yml, None if it isn't a version"""
+    version_dir = os.path.join(download_dir, folder)
+    meta_file = os.path.join(version_dir, "metadata.yml")
+    try:
+        meta = (yaml_io.load_file(meta_file) or {})["metadata"]
+        installed_at = meta.get("installed_at") or os.path.getmtime(meta_file)
+    except (OSError, KeyError, TypeError, yaml_io.YAMLError) as e:
+        if os.path.exists(meta_file):
+            print(f"Error reading metadata for {folder}: {e}")
+        return None
+    files = meta.get("files") or {}
+    exe = game.game_executable(download_dir, folder)
+    return {
+        "version": meta["version"],
+        "installed_at": installed_at,
+        "size": sum(f["size"] for f in files.values()) if files else _tree_size(os.path.join(version_dir, "source")),
+        "files": files,
+        "executable": exe if os.path.exists(exe) else None,
+    }
+
+
+class VersionIndex:
+    """
+    Persistent index of the installed versions in download_dir, kept in the launcher's appdata
+    folder so the Version Manager doesn't have to open every metadata.yml.
+    It is updated incrementally by install, rename and delete and only re-synced with the disk
+    when download_dir's mtime shows a change the index didn't see.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(get_launcher_dir(), INDEX_FILE_NAME)
+        self._lock = threading.RLock()
+        self._data = None
+
+    def _load(self):
+        if self._data is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._data = json.load(f)
+            except (OSError, ValueError):
+                self._data = {}
+        return self._data
+
+    def _save(self):
+        atomic_write_json(self.path, self._data)
+
+    def _versions(self, download_dir):
+        data = self._load()
+        if data.get("download_dir") != download_dir:
+            data.clear()
+            data.update({"download_dir": download_dir, "stamp": None, "versions": {}})
+        return data["versions"]
+
+    def sync(self, download_dir):
+        """Bring the index up to date with download_dir, only new folders get their metadata read"""
+        with self._lock:
+            versions = self._versions(download_dir)
+            try:
+                folders = {n for n in os.listdir(download_dir) if not n.startswith(".")}
+            except OSError:
+                folders = set()
+            for folder in set(versions) - folders:
+                del versions[folder]
+            for folder in folders - set(versions):
+                entry = read_version_entry(download_dir, folder)
+                if entry:
+                    versions[folder] = entry
+            self._data["stamp"] = _dir_stamp(download_dir)
+            self._save()
+
+    def entries(self, download_dir):
+        """{folder: entry} of the installed versions, re-synced only if download_dir changed behind our back"""
+        with self._lock:
+            self._versions(download_dir)
+            if self._data["stamp"] is None or self._data["stamp"] != _dir_stamp(download_dir):
+                self.sync(download_dir)
+            return dict(self._data["versions"])
+
+    def add(self, download_dir, folder):
+        """(Re)index one version, e.g. after an install"""
+        with self._lock:
+            versions = self._versions(download_dir)
+            entry = read_version_entry(download_dir, folder)
+            if entry:
+                versions[folder] = entry
+            else:
+                versions.pop(folder, None)
+            self._data["stamp"] = _dir_stamp(download_dir)
+            self._save()
+
+    def remove(self, download_dir, folder):
+        with self._lock:
+            self._versions(download_dir).pop(folder, None)
+            self._data["stamp"] = _dir_stamp(download_dir)
+            self._save()
+
+    def rename(self, download_dir, old, new):
+        with self._lock:
+            versions = self._versions(download_dir)
+            entry = versions.pop(old, None)
+            if entry is None or not os.path.isdir(os.path.join(download_dir, new)):
+                return self.add(download_dir, new)
+            exe = game.game_executable(download_dir, new)
+            entry["executable"] = exe if os.path.exists(exe) else None
+            versions[new] = entry
+            self._data["stamp"] = _dir_stamp(download_dir)
+            self._save()
+
+    def apply_events(self, download_dir, events):
+        """Feed the version watcher's events into the index"""
+        for event in events:
+            kind = event[0]
+            if kind == "renamed":
+                self.rename(download_dir, event[1], event[2])
+            elif kind == "removed":
+                self.remove(download_dir, event[1])
+            elif kind in ("added", "changed"):
+                self.add(download_dir, event[1])
+
+
+index = VersionIndex()
@@ -0,0 +1,259 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+
+# inotify constants from <sys/inotify.h>
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+EVENT_HEADER = struct.Struct("iIII")
+
+POLL_MIN_INTERVAL = 0.5
+POLL_MAX_INTERVAL = 10.0
+
+
+def _load_inotify():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+_libc = _load_inotify()
+
+
+class VersionWatcher:
+    """
+    Watches the versions directory and pushes add/remove/rename events to listeners.
+    Uses inotify on Linux and falls back to polling that backs off while nothing changes.
+    Listeners are called with (events, names) where events is a list of tuples
+    ("added", name), ("removed", name), ("renamed", old, new) or ("changed", name)
+    and names is the sorted current listing. Hidden entries (like .partial) are ignored.
+    """
+
+    def __init__(self, path, dispatch=None):
+        self.path = path
+        self.names = self._scan()
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._dispatch = dispatch or (lambda fn: fn())
+        self._stop_event = threading.Event()
+        self._use_inotify = _libc is not None
+        # Polling waits on the event, inotify on the pipe because it has to select() next to the inotify fd
+        # (on Windows select() only takes sockets)
+        self._wake_event = threading.Event()
+        self._wake_r, self._wake_w = os.pipe() if self._use_inotify else (None, None)
+        self._thread = None
+
+    # --- public API ---
+
+    def subscribe(self, listener):
+        with self._lock:
+            self._listeners.append(listener)
+            names = list(self.names)
+        self._dispatch(lambda: listener([], names))
+
+    def unsubscribe(self, listener):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="version-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        self._stop_event.set()
+        self._wake()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        print("thread-1 stopped (version watcher)")
+
+    def set_path(self, path):
+        """Point the watcher at a different download_dir"""
+        if path == self.path:
+            return
+        self.path = path
+        self._wake()
+
+    def rescan(self):
+        """
+        Look at the directory right away, e.g. after the launcher renamed or deleted a version itself.
+        inotify reports such changes anyway, the polling fallback would only see them at its next poll.
+        """
+        self._wake()
+
+    def notify_changed(self, name):
+        """Let listeners know that the content of a version folder changed (e.g. a finished install)"""
+        self._emit([("changed", name)], self._scan())
+
+    # --- internals ---
+
+    def _wake(self):
+        self._wake_event.set()
+        if self._wake_w is None:
+            return
+        try:
+            os.write(self._wake_w, b"x")
+        except OSError:
+            pass
+
+    def _drain_wake(self):
+        self._wake_event.clear()
+        if self._wake_r is None:
+            return
+        try:
+            while select.select([self._wake_r], [], [], 0)[0]:
+                os.read(self._wake_r, 512)
+        except OSError:
+            pass
+
+    def _scan(self):
+        try:
+            return sorted(n for n in os.listdir(self.path) if not n.startswith("."))
+        except OSError:
+            return []
+
+    def _emit(self, events, names):
+        with self._lock:
+            self.names = names
+            listeners = list(self._listeners)
+        for listener in listeners:
+            self._dispatch(lambda listener=listener: listener(events, names))
+
+    def _emit_diff(self, old, new):
+        events = [("removed", n) for n in sorted(set(old) - set(new))]
+        events += [("added", n) for n in sorted(set(new) - set(old))]
+        if events:
+            self._emit(events, new)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            path = self.path
+            new = self._scan()
+            self._emit_diff(self.names, new)
+            if self._use_inotify and os.path.isdir(path):
+                if self._watch_inotify(path):
+                    continue
+                self._use_inotify = False
+            self._watch_polling(path)
+
+    def _watch_polling(self, path):
+        interval = POLL_MIN_INTERVAL
+        while not self._stop_event.is_set() and path == self.path:
+            woken = self._wake_event.wait(interval)
+            if woken:
+                self._drain_wake()
+                if self._stop_event.is_set() or path != self.path:
+                    continue
+            new = self._scan()
+            if new != self.names:
+                self._emit_diff(self.names, new)
+                interval = POLL_MIN_INTERVAL
+            else:
+                interval = min(interval * 2, POLL_MAX_INTERVAL)
+            # Switch over to inotify once the directory shows up
+            if self._use_inotify and os.path.isdir(path):
+                return
+
+    def _watch_inotify(self, path):
+        """Block on inotify events for path. Returns False if inotify could not be set up."""
+        fd = _libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return False
+        try:
+            wd = _libc.inotify_add_watch(fd, os.fsencode(path), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err in (errno.ENOENT, errno.ENOTDIR):
+                    # Directory vanished in the meantime, poll until it is back
+                    return True
+                print(f"inotify_add_watch failed: {os.strerror(err)}")
+                return False
+            # Catch anything that changed between the scan and the watch
+            self._emit_diff(self.names, self._scan())
+            while not self._stop_event.is_set() and path == self.path:
+                ready, _, _ = select.select([fd, self._wake_r], [], [])
+                if self._wake_r in ready:
+                    self._drain_wake()
+                if fd not in ready:
+                    continue
+                try:
+                    buf = os.read(fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                if not self._handle_inotify(buf):
+                    return True
+            return True
+        finally:
+            os.close(fd)
+
+    def _handle_inotify(self, buf):
+        """Turn a buffer of inotify events into listener events. Returns False if the watch is gone."""
+        names = set(self.names)
+        events = []
+        moved_from = {}
+        alive = True
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(buf):
+            _, mask, cookie, length = EVENT_HEADER.unpack_from(buf, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(buf[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if name.startswith(".") and not mask & (IN_MOVED_FROM | IN_MOVED_TO):
+                continue  # hidden download and staging folders
+
+            if mask & IN_Q_OVERFLOW:
+                new = self._scan()
+                self._emit_diff(sorted(names), new)
+                names = set(new)
+                events = []
+                moved_from = {}
+            elif mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                alive = False
+            elif mask & IN_MOVED_FROM:
+                moved_from[cookie] = name
+                names.discard(name)
+            elif mask & IN_MOVED_TO:
+                old = moved_from.pop(cookie, None)
+                if name.startswith("."):
+                    if old is not None and not old.startswith("."):
+                        events.append(("removed", old))
+                    continue
+                if old is None or old.startswith("."):
+                    events.append(("added", name))
+                else:
+                    events.append(("renamed", old, name))
+                names.add(name)
+            elif mask & IN_CREATE:
+                events.append(("added", name))
+                names.add(name)
+            elif mask & IN_DELETE:
+                events.append(("removed", name))
+                names.discard(name)
+
+        # A move out of the directory has no matching IN_MOVED_TO
+        events += [("removed", old) for old in moved_from.values() if not old.startswith(".")]
+        if events:
+            self._emit(events, sorted(names))
+        return alive
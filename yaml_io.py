@@ -0,0 +1,21 @@
+import yaml
+
+# libyaml's C loader/dumper are several times faster, fall back to pure Python without them
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+Dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+YAMLError = yaml.YAMLError
+
+
+def load(stream):
+    """Parse a YAML document safely, stream may be a string or a file object"""
+    return yaml.load(stream, Loader=Loader)
+
+
+def load_file(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return load(f)
+
+
+def dump(data, stream=None):
+    """Dump data the way the launcher always wrote its YAML files, returns a string without stream"""
+    return yaml.dump(data, stream, Dumper=Dumper, allow_unicode=True)